@@ -3,6 +3,7 @@ import numpy as np
 from joblib import Parallel, delayed
 import json
 import config
+import profiling
 import nltk
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
@@ -18,14 +19,31 @@ nltk.download('wordnet')
 
 class ArtifactAnalyzer:
     def __init__(self, model_name='all-MiniLM-L6-v2', artifact_file='artifact.jsonl',
-                 analyzed_file='analyzed_artifacts.jsonl', Civilization_Class=None):
-        self.model = SentenceTransformer(model_name)
+                 analyzed_file='analyzed_artifacts.jsonl', worlds=(), timer=None):
+        self.timer = timer or profiling.default_timer
+        with self.timer.span("analysis.load_model"):
+            self.model = SentenceTransformer(model_name)
         self.artifact_file = artifact_file
         self.analyzed_file = analyzed_file
-        self.Civilization_Class = Civilization_Class
+        # Worlds whose civilizations the artifacts were generated by
+        self.worlds = list(worlds)
         self.existing_artifacts = self.load_artifacts(self.artifact_file)
         self.previously_analyzed = self.load_artifacts(self.analyzed_file)
 
+    def find_civilization(self, name, world_seed=None):
+        """
+        Look a civilization up by name in the World with seed `world_seed`. Civilization names repeat across
+        Worlds, so only artifacts without a world seed fall back to the first analyzed World with the name.
+        """
+        if world_seed is not None:
+            world = next((world for world in self.worlds if world.seed == world_seed), None)
+            return world.civilizations_by_name.get(name) if world is not None else None
+        for world in self.worlds:
+            civ = world.civilizations_by_name.get(name)
+            if civ is not None:
+                return civ
+        return None
+
     @staticmethod
     def load_artifacts(jsonl_file):
         """Load artifacts from a JSONL file."""
@@ -191,7 +209,7 @@ class ArtifactAnalyzer:
     def cumulative_analysis_score(self, artifact, narrative_weight=0.335, accuracy_weight=0.2, novelty_weight=0.465):
         """Combine scores for narrative integration, cultural accuracy, and novelty."""
         civ_name = artifact.get('Civilization Name')
-        civ = self.Civilization_Class.Civilizations_by_name.get(civ_name)
+        civ = self.find_civilization(civ_name, artifact.get('World Seed'))
 
         if not civ:
             print(f"Error: Civilization '{civ_name}' not found.")
@@ -241,12 +259,16 @@ class ArtifactAnalyzer:
         artifacts = artifacts or self.existing_artifacts
         analyze_fn = self.analyze_artifact
 
-        if parallel:
-            analyzed_artifacts = Parallel(n_jobs=-1)(delayed(analyze_fn)(artifact) for artifact in artifacts)
-        else:
-            analyzed_artifacts = [analyze_fn(artifact) for artifact in artifacts]
+        # Timed around the whole batch, since parallel workers don't share the timer
+        with self.timer.span("analysis.score"):
+            if parallel:
+                analyzed_artifacts = Parallel(n_jobs=-1)(delayed(analyze_fn)(artifact) for artifact in artifacts)
+            else:
+                analyzed_artifacts = [analyze_fn(artifact) for artifact in artifacts]
+        self.timer.count("artifacts_analyzed", len(analyzed_artifacts))
 
-        self.save_artifacts(analyzed_artifacts, self.analyzed_file)
+        with self.timer.span("analysis.save"):
+            self.save_artifacts(analyzed_artifacts, self.analyzed_file)
         avg_score = np.mean([artifact['cumulative_score'] for artifact in analyzed_artifacts])
         self.clear_artifact_file()
         return avg_score
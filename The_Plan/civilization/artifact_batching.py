@@ -0,0 +1,80 @@
+import json
+import re
+import config
+from llm_client import ChatRequest
+from tokens import count_tokens
+
+# Fields every artifact must have, from the JSON format the prompts ask for
+artifact_fields = config.json_format.split()
+
+
+def batch_request(contexts, model="gpt-3.5-turbo", max_tokens=400, temperature=0.7):
+    """
+    One ChatRequest asking for an artifact for each of several civilizations, as a JSON array.
+
+    Parameters:
+    contexts (list): `Civilization.artifact_context` pairs, one per civilization.
+    max_tokens (int): Completion tokens allowed per artifact.
+
+    Returns:
+    ChatRequest: A request of kind "artifact_batch".
+    """
+    sections = "".join(f"\n        Civilization {number}:{context}{history}\n"
+                       for number, (context, history) in enumerate(contexts, start=1))
+    prompt = f"""
+        Describe one unique cultural artifact for each of the {len(contexts)} civilizations below, each using its own cultural context.
+{sections}
+        The response should be a JSON array of {len(contexts)} objects, one per civilization in the order given, each in the following JSON format:
+
+            {config.json_format}
+
+        Be sure to integrate aspects of each civilization into its artifact, selecting aspects of their values, environment, and technological level to shape the artifact's form and function. Respond with the JSON array only.
+
+        """
+    return ChatRequest(prompt, model, max_tokens * len(contexts), temperature, kind="artifact_batch")
+
+
+def plan_batches(contexts, batch_size, token_budget, max_tokens=400, model="gpt-3.5-turbo"):
+    """
+    Split civilization indices into batches of at most `batch_size`, each small enough that its prompt
+    and the artifacts it asks for fit in `token_budget` tokens. A civilization too large to share a
+    batch gets one to itself.
+    """
+    overhead = count_tokens(batch_request([], model).prompt, model)
+    batches = []
+    batch, batch_tokens = [], overhead
+    for index, (context, history) in enumerate(contexts):
+        tokens = count_tokens(context + history, model) + max_tokens
+        if batch and (len(batch) == batch_size or batch_tokens + tokens > token_budget):
+            batches.append(batch)
+            batch, batch_tokens = [], overhead
+        batch.append(index)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def split_batch_response(content, count):
+    """
+    Validate a batch response and split it into one artifact JSON string per civilization.
+
+    Returns:
+    list: `count` artifact JSON strings, with None for each civilization whose artifact is missing or
+    malformed. All are None if the response isn't a JSON array of `count` elements.
+    """
+    if isinstance(content, Exception):
+        return [None] * count
+    # Models sometimes wrap the array in a Markdown code fence
+    content = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", content)
+    try:
+        artifacts = json.loads(content)
+    except json.JSONDecodeError:
+        return [None] * count
+    if isinstance(artifacts, dict) and len(artifacts) == 1:
+        artifacts = next(iter(artifacts.values()))
+    if not isinstance(artifacts, list) or len(artifacts) != count:
+        return [None] * count
+    return [json.dumps(artifact) if isinstance(artifact, dict) and all(
+                isinstance(artifact.get(field), str) for field in artifact_fields) else None
+            for artifact in artifacts]
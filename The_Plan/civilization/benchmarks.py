@@ -0,0 +1,110 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from noise import pnoise2
+from perlin import pnoise2_grid
+import world_batch
+from headless_simulation import HeadlessSimulation
+from map_generation import TerrainMap
+
+
+def time_call(fn, repeats=1):
+    """Return the best wall time in seconds over `repeats` calls of `fn`, and its last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_height_map(sizes=(25, 256, 1024, 2048), base_scale=40.0, octaves=6, persistence=0.5,
+                         lacunarity=2.0, seed=21, reference_limit=2048):
+    """
+    Compare the per-cell `np.vectorize(pnoise2)` height map against the vectorized `pnoise2_grid` engine.
+    The reference path is skipped above `reference_limit` cells per side, where it gets slow.
+    """
+    print(f"{'size':>6} {'pnoise2 (s)':>12} {'grid (s)':>10} {'speedup':>9} {'max diff':>10}")
+    for size in sizes:
+        x_indices = np.arange(size) / base_scale
+        y_indices = np.arange(size) / base_scale
+
+        grid_time, grid_map = time_call(lambda: pnoise2_grid(
+            x_indices, y_indices, octaves=octaves, persistence=persistence,
+            lacunarity=lacunarity, repeatx=size, repeaty=size, base=seed
+        ), repeats=3)
+
+        if size > reference_limit:
+            print(f"{size:>6} {'skipped':>12} {grid_time:>10.4f} {'-':>9} {'-':>10}")
+            continue
+
+        x_grid, y_grid = np.meshgrid(x_indices, y_indices, indexing='ij')
+        reference_time, reference_map = time_call(lambda: np.vectorize(lambda x, y: pnoise2(
+            x, y, octaves=octaves, persistence=persistence,
+            lacunarity=lacunarity, repeatx=size, repeaty=size, base=seed
+        ))(x_grid, y_grid))
+
+        max_diff = np.max(np.abs(reference_map - grid_map))
+        print(f"{size:>6} {reference_time:>12.4f} {grid_time:>10.4f} {reference_time / grid_time:>8.1f}x {max_diff:>10.2e}")
+
+
+def benchmark_import_civilization(repeats=5):
+    """Time `import civilization` in a fresh interpreter, plus the first access to a World's map."""
+    script = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import civilization\n"
+        "imported = time.perf_counter()\n"
+        "civilization.World().map\n"
+        "print(imported - start, time.perf_counter() - imported)\n"
+    )
+    cwd = os.path.dirname(os.path.abspath(__file__))
+
+    import_times, map_times = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", script], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout
+        import_time, map_time = map(float, output.split()[-2:])
+        import_times.append(import_time)
+        map_times.append(map_time)
+
+    print(f"import civilization: best {min(import_times):.4f}s, mean {np.mean(import_times):.4f}s")
+    print(f"first World.map access: best {min(map_times):.4f}s, mean {np.mean(map_times):.4f}s")
+
+
+def benchmark_world_batch(worlds=16, size=512, worker_counts=(1, 2, 4, 8)):
+    """Time generating a batch of worlds across process pools of increasing size."""
+    param_sets = [{"seed": seed, "width": size, "height": size} for seed in range(1, worlds + 1)]
+    worker_counts = [workers for workers in worker_counts if workers <= (os.cpu_count() or 1)]
+
+    print(f"{'workers':>8} {'time (s)':>10} {'speedup':>9}")
+    baseline = None
+    for workers in worker_counts:
+        output_dir = tempfile.mkdtemp(prefix="cultura_worlds_")
+        try:
+            elapsed, _ = time_call(lambda: world_batch.generate_worlds(param_sets, output_dir, max_workers=workers))
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {baseline / elapsed:>8.2f}x")
+
+
+def benchmark_headless_simulation(civs=10000, ages=1000, size=256):
+    """Time the LLM-free headless core advancing `civs` civilizations through `ages` ages."""
+    terrain = TerrainMap(width=size, height=size, seed=21)
+    setup_time, simulation = time_call(lambda: HeadlessSimulation.from_map(terrain, civs))
+    run_time, _ = time_call(lambda: simulation.run(ages))
+    print(f"headless: founded {civs} civs in {setup_time:.3f}s, ran {ages} ages in {run_time:.3f}s "
+          f"({civs * ages / run_time:,.0f} civ-ages/s)")
+
+
+if __name__ == "__main__":
+    benchmark_height_map()
+    benchmark_import_civilization()
+    benchmark_world_batch()
+    benchmark_headless_simulation()
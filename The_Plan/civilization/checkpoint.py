@@ -0,0 +1,193 @@
+import json
+import os
+import random
+import threading
+import numpy as np
+import event_log
+import spatial_index
+import trait_registry
+from map_generation import TerrainMap
+from trait_registry import TraitSet
+from world import World
+
+# Bump whenever the checkpoint layout changes
+CHECKPOINT_FORMAT_VERSION = 2
+
+
+def python_rng_state(rng):
+    """JSON-friendly state of a `random.Random`, or None for the shared `random` module."""
+    return None if rng is random else rng.getstate()
+
+
+def restore_python_rng(state):
+    if state is None:
+        return random
+    rng = random.Random()
+    version, internal, gauss_next = state
+    rng.setstate((version, tuple(internal), gauss_next))
+    return rng
+
+
+def save_checkpoint(path, world):
+    """
+    Write the whole run state of a World to a compressed `.npz` at `path`.
+
+    Map layers, the event log columns and civilization traits are stored as arrays. Everything else
+    (names, summaries, artifacts, counters, random generator states) goes into one JSON blob. The size of
+    the world's artifact file is recorded so a resumed run can drop artifacts written after the checkpoint.
+    """
+    terrain = world.map
+    civilizations = world.civilizations
+    log = world.log
+    artifact_file = world.artifact_file
+
+    arrays = {f"map_{name}": np.asarray(getattr(terrain, name)) for name in terrain.cached_layers}
+    arrays["civ_locations"] = np.array([civ.location for civ in civilizations], dtype=np.int32).reshape(-1, 2)
+    arrays["civ_tech_levels"] = np.array([civ.tech_level for civ in civilizations], dtype=np.int16)
+
+    trait_ids = [civ.traits.ids() for civ in civilizations]
+    arrays["trait_offsets"] = np.cumsum([0] + [len(ids) for ids in trait_ids]).astype(np.int64)
+    arrays["trait_ids"] = np.array([i for ids in trait_ids for i in ids], dtype=np.int32)
+    arrays["trait_counts"] = np.array([civ.traits.counts[i] for civ, ids in zip(civilizations, trait_ids) for i in ids],
+                                      dtype=np.int32)
+    for name in log.columns:
+        arrays[f"log_{name}"] = log.column(name)
+
+    state = {
+        "version": CHECKPOINT_FORMAT_VERSION,
+        "map_params": terrain.params(),
+        "seed": world.seed,
+        "current_year": world.current_year,
+        "year_progression": world.year_progression,
+        "current_age": world.current_age,
+        "default_r": world.default_r,
+        "spatial_cell_size": world.spatial_index.cell_size,
+        "speed_multiplier": world.speed_multiplier,
+        "existing_artifacts": world.existing_artifacts,
+        "trait_names": trait_registry.registry.names,
+        "log_names": log.names,
+        "log_notes": log.notes,
+        "relations": [[a, b, positive, negative] for (a, b), (positive, negative) in world.scheduler.relations.items()],
+        "exchange_progress": [[a, b, positive, negative]
+                              for (a, b), (positive, negative) in world.scheduler.exchange_progress.items()],
+        "artifact_file": artifact_file,
+        "artifact_offset": os.path.getsize(artifact_file) if os.path.exists(artifact_file) else 0,
+        "civilizations": [{
+            "name": civ.name,
+            "terrain_type": civ.terrain_type,
+            "cultural_context": civ.cultural_context,
+            "artifacts": civ.artifacts,
+            "string_history": civ.string_history,
+            "string_neighbor_history": civ.string_neighbor_history,
+            "history_digest": civ.history_digest.state(),
+            "neighbor_digest": civ.neighbor_digest.state(),
+            "neighbors": [neighbor.id for neighbor in civ.neighbors],
+            "rng_state": python_rng_state(civ.rng),
+        } for civ in civilizations],
+    }
+    arrays["state"] = np.frombuffer(json.dumps(state).encode("utf-8"), dtype=np.uint8)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_checkpoint(path):
+    """Restore a World saved by `save_checkpoint`, ready to continue from the age it was saved after."""
+    from civilization import Civilization
+
+    with np.load(path) as data:
+        arrays = {name: data[name] for name in data.files}
+    state = json.loads(arrays.pop("state").tobytes().decode("utf-8"))
+    if state["version"] != CHECKPOINT_FORMAT_VERSION:
+        raise ValueError(f"Checkpoint format {state['version']} is not supported, expected {CHECKPOINT_FORMAT_VERSION}.")
+
+    # Trait ids in the saved bitsets refer to the saved registry order
+    for trait_id, name in enumerate(state["trait_names"]):
+        if trait_registry.registry.intern(name) != trait_id:
+            raise ValueError(f"Checkpoint trait {name!r} does not match the trait registry; was config.py changed?")
+
+    layers = {name[len("map_"):]: array for name, array in arrays.items() if name.startswith("map_")}
+    world = World(width=state["map_params"]["width"], height=state["map_params"]["height"], seed=state["seed"],
+                  artifact_file=state["artifact_file"])
+    world.map = TerrainMap.from_layers(layers, **state["map_params"])
+    world.default_r = state["default_r"]
+    world.spatial_index = spatial_index.GridSpatialIndex(cell_size=state["spatial_cell_size"])
+    world.current_year = state["current_year"]
+    world.year_progression = state["year_progression"]
+    world.current_age = state["current_age"]
+    world.speed_multiplier = state["speed_multiplier"]
+    world.existing_artifacts = state["existing_artifacts"]
+    world.scheduler.relations = {(a, b): [positive, negative] for a, b, positive, negative in state["relations"]}
+    world.scheduler.exchange_progress = {(a, b): [positive, negative]
+                                         for a, b, positive, negative in state.get("exchange_progress", [])}
+    world.log = event_log.EventLog.from_columns(
+        {name: arrays[f"log_{name}"] for name in event_log.EventLog.columns}, state["log_names"], state["log_notes"])
+
+    offsets = arrays["trait_offsets"]
+    for civ_id, civ_state in enumerate(state["civilizations"]):
+        civ = Civilization.__new__(Civilization)
+        civ.world = world
+        civ.id = civ_id
+        civ.name = civ_state["name"]
+        civ.rng = restore_python_rng(civ_state["rng_state"])
+        civ.location = tuple(int(v) for v in arrays["civ_locations"][civ_id])
+        civ.terrain_type = civ_state["terrain_type"]
+        civ.tech_level = int(arrays["civ_tech_levels"][civ_id])
+        trait_ids = arrays["trait_ids"][offsets[civ_id]:offsets[civ_id + 1]].tolist()
+        civ.traits = TraitSet.from_ids(trait_ids)
+        civ.traits.counts = dict(zip(trait_ids, arrays["trait_counts"][offsets[civ_id]:offsets[civ_id + 1]].tolist()))
+        civ.cultural_context = civ_state["cultural_context"]
+        civ.artifacts = civ_state["artifacts"]
+        civ.history = world.log.view(event_log.HISTORY, civ_id)
+        civ.string_history = civ_state["string_history"]
+        civ.neighbor_history = world.log.view(event_log.NEIGHBOR, civ_id)
+        civ.string_neighbor_history = civ_state["string_neighbor_history"]
+        civ.history_digest = civ.make_digest(civ.string_history).restore(civ_state["history_digest"])
+        civ.neighbor_digest = civ.make_digest(civ.string_neighbor_history).restore(civ_state["neighbor_digest"])
+
+        world.map.occupancy.occupy(*civ.location, civ_id=civ_id)
+        world.spatial_index.insert(civ, civ.location)
+        world.civilizations.append(civ)
+        world.civilizations_by_name[civ.name] = civ
+    for civ, civ_state in zip(world.civilizations, state["civilizations"]):
+        civ.neighbors = [world.civilizations[neighbor_id] for neighbor_id in civ_state["neighbors"]]
+
+    # Size of the artifact file when the checkpoint was saved, see discard_artifacts_after
+    world.artifact_offset = state["artifact_offset"]
+    return world
+
+
+def discard_artifacts_after(artifact_file, offset, seed):
+    """
+    Remove the artifacts the World with `seed` appended to `artifact_file` past byte `offset`, e.g. those a
+    crashed run wrote after its last checkpoint, so they aren't duplicated when it resumes. Artifacts of
+    other Worlds sharing the file are kept.
+
+    Returns:
+    int: The number of artifacts removed.
+    """
+    if not os.path.exists(artifact_file) or os.path.getsize(artifact_file) <= offset:
+        return 0
+    with open(artifact_file, "rb") as file:
+        head = file.read(offset)
+        tail = file.read().splitlines(keepends=True)
+
+    def from_world(line):
+        try:
+            artifact = json.loads(line)
+        except ValueError:
+            return False
+        return isinstance(artifact, dict) and artifact.get("World Seed") == seed
+
+    kept = [line for line in tail if not from_world(line)]
+    if len(kept) < len(tail):
+        with open(artifact_file, "wb") as file:
+            file.write(head)
+            file.writelines(kept)
+    return len(tail) - len(kept)
@@ -183,6 +183,11 @@ base_traits = {
 }
 
 
+# Trait every civilization is founded with one of
+founding_traits = ["Innovative", "Tradition-Oriented", "Expansive", "Artistic"]
+# Traits a civilization may gain when it progresses to a new era
+progression_traits = ["Visionary", "Pragmatic", "Ambitious", "Altruistic"]
+
 
 cmap = ListedColormap([
     (0.2, 0.4, 0.8),  # Water - blue
@@ -217,9 +222,73 @@ civ_names = [
 
 Cvilization_Class_config = {
     "Event_Limit": 5, 
-    "Neighbor_Interaction_Limit": 5, 
+    "Neighbor_Interaction_Limit": 5,  # interaction events per age spread over the scheduled pairs, at least one per pair
     "Starting_Year":-4000,
     "Year_Progression": 50,
     "Speed_Multiplier": 1,
     "Dev_Mode": False
-}
\ No newline at end of file
+}
+
+Terrain_Map_config = {
+    "Cache_Enabled": True,
+    "Cache_Dir": ".terrain_cache",
+    "Max_Cache_Bytes": 512 * 1024 * 1024,
+}
+
+
+Terrain_Feature_config = {
+    "Window": 5,  # side of the square neighborhood for ruggedness and forest density
+    "Max_Distance": 64,  # distances are capped here, which bounds the halo tiled maps need
+    "Coastal_Distance": 2,
+    "Mountain_Distance": 2,
+    "Forest_Density": 0.5,
+    "Placement_Candidates": 1,  # free cells drawn per placement, the best scoring one is used
+}
+
+
+Interaction_config = {
+    "Pair_Budget": 16,  # neighbor pairs that interact per age
+    "Weighting": "distance",  # "distance", "relationship" or None for uniform pairs
+    "Distance_Scale": 10.0,  # distance at which a pair is half as likely to be scheduled
+    "Max_Attempts": 10,  # pair draws per budgeted pair before giving up on filling the budget
+    "Exchange_Threshold": 2,  # positive interactions a pair needs before exchanging traits
+}
+
+
+Checkpoint_config = {
+    "Every_Ages": 5,  # 0 disables checkpoints
+    # Default checkpoint file, "{seed}" is replaced by the World's seed so separate runs don't overwrite each other
+    "Path": "checkpoints/cultura_{seed}.npz",
+}
+
+
+Profiling_config = {
+    "Enabled": True,  # collect phase timings and write a JSON report at the end of a run
+    # "{seed}" in the paths is replaced by the World's seed so separate runs don't overwrite each other
+    "Report_Path": "profile_{seed}.json",
+    "Profiler": None,  # None, "cprofile" or "pyinstrument" to also profile the whole run
+    "Profiler_Path": "profile_{seed}.prof",  # pstats file for cprofile, HTML for pyinstrument
+}
+
+
+LLM_config = {
+    "Backend": "openai",  # "openai", or "stub" for offline, deterministic responses
+    "Stub_Latency": 0.0,  # seconds the stub backend spends per request
+    "Stub_Jitter": 0.0,  # up to this many extra seconds per stub request
+    "Stub_Failure_Rate": 0.0,  # fraction of stub requests that fail
+    "Max_Concurrency": 8,  # requests in flight at once when a World sends an age's requests, 1 sends them one by one
+    "Request_Timeout": 60,  # seconds
+    "Artifact_Batch_Size": 1,  # civilizations whose artifacts are asked for in one request, 1 disables batching
+    "Batch_Token_Budget": 12000,  # prompt plus completion tokens a batched request may use
+    "Cache_Enabled": True,  # answer byte-identical requests from the response cache
+    "Cache_Path": ".llm_cache/responses.sqlite",
+    "Max_Cache_Bytes": 256 * 1024 * 1024,
+    "Cache_Only": False,  # replay runs from the cache only, a request missing from it raises CacheMissError
+}
+
+
+History_Summary_config = {
+    "Token_Budget": 1200,  # tokens of summarized history an artifact prompt may include
+    "Keep_Recent": 3,  # latest per-age summaries always kept verbatim
+    "Era_Max_Tokens": 250,  # length of each era summary older ages are folded into
+}
@@ -0,0 +1,180 @@
+from array import array
+import numpy as np
+import config
+import event_picker
+import trait_registry
+
+# Channels a record is filed under: a civilization's own history or its neighbor history
+HISTORY = 0
+NEIGHBOR = 1
+
+# Record kinds, the `kind` column
+NOTE = 0         # free text, `code` indexes EventLog.notes
+EVENT = 1        # `code` is an event id, `detail` its event type id
+PROGRESS = 2     # `code` is the new tech level
+REGRESS = 3      # `code` is the new tech level
+GAIN_TRAIT = 4   # `code` is a trait id
+LOSE_TRAIT = 5   # `code` is a trait id
+INTERACTION = 6  # `code` is an event id, `detail` its event type id
+EXCHANGE = 7     # `civ` received trait `code` from `counterpart`, which received trait `detail`
+
+
+class EventLog:
+    """
+    Append-only columnar log of everything that happens to every civilization.
+
+    Each record is one row across growable NumPy columns (channel, year, civ id, counterpart id, kind, code,
+    detail, outcome), so an interaction between two civilizations is stored once rather than as a string per side.
+    Text is only rendered when a view is read, e.g. for a prompt or a report.
+    """
+    columns = {
+        "channel": np.uint8,
+        "year": np.int64,
+        "civ": np.int32,
+        "counterpart": np.int32,
+        "kind": np.uint8,
+        "code": np.int32,
+        "detail": np.int32,
+        "outcome": np.int8,
+    }
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.data = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.columns.items()}
+        self.names = []
+        self.notes = []
+        # Row numbers of each (channel, civ id) view, in order
+        self.index = {}
+
+    def column(self, name):
+        """The filled part of a column."""
+        return self.data[name][:self.size]
+
+    def grow(self):
+        for name, column in self.data.items():
+            grown = np.empty(max(1, 2 * len(column)), dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.data[name] = grown
+
+    def rows(self, channel, civ_id):
+        """Row numbers filed under a civilization's view, as an array for columnar queries."""
+        return np.frombuffer(self.index.get((channel, civ_id), array("q")), dtype=np.int64)
+
+    def record(self, channel, year, civ_id, kind, code=-1, outcome=-1, counterpart=-1, detail=-1):
+        """
+        Append a record and file it under the civilization's view, and the counterpart's if there is one.
+
+        Parameters:
+        channel (int): HISTORY or NEIGHBOR.
+        year (int): Year the record happened in.
+        civ_id (int): Civilization the record is about.
+        kind (int): One of the record kinds defined in this module.
+        code, detail (int, optional): Kind-specific codes, see the kind constants.
+        outcome (int, optional): Outcome id in `EventTable.outcomes`, -1 if not applicable.
+        counterpart (int, optional): Other civilization involved, -1 if none.
+
+        Returns:
+        int: The row number of the record.
+        """
+        if self.size == len(self.data["year"]):
+            self.grow()
+        row = self.size
+        for name, value in (("channel", channel), ("year", year), ("civ", civ_id), ("counterpart", counterpart),
+                            ("kind", kind), ("code", code), ("detail", detail), ("outcome", outcome)):
+            self.data[name][row] = value
+        self.size += 1
+        self.file(row, channel, civ_id, counterpart)
+        return row
+
+    def file(self, row, channel, civ_id, counterpart):
+        self.index.setdefault((channel, civ_id), array("q")).append(row)
+        if counterpart >= 0 and counterpart != civ_id:
+            self.index.setdefault((channel, counterpart), array("q")).append(row)
+
+    @classmethod
+    def from_columns(cls, columns, names, notes):
+        """Rebuild a log, including its view index, from saved columns."""
+        log = cls(capacity=max(1, len(columns["year"])))
+        log.size = len(columns["year"])
+        for name in cls.columns:
+            log.data[name][:log.size] = columns[name]
+        log.names = list(names)
+        log.notes = list(notes)
+        for row, (channel, civ_id, counterpart) in enumerate(zip(
+                columns["channel"].tolist(), columns["civ"].tolist(), columns["counterpart"].tolist())):
+            log.file(row, channel, civ_id, counterpart)
+        return log
+
+    def note(self, channel, year, civ_id, text):
+        """Append a free-text record."""
+        self.notes.append(text)
+        return self.record(channel, year, civ_id, NOTE, code=len(self.notes) - 1)
+
+    def render(self, row):
+        """Render one record as the history line it stands for."""
+        kind = self.data["kind"][row]
+        code = int(self.data["code"][row])
+        detail = int(self.data["detail"][row])
+        name = self.names[self.data["civ"][row]]
+        counterpart = self.data["counterpart"][row]
+        counterpart_name = self.names[counterpart] if counterpart >= 0 else None
+        table = event_picker.event_table
+        outcome = table.outcomes[self.data["outcome"][row]] if self.data["outcome"][row] >= 0 else None
+        trait_names = trait_registry.registry.names
+
+        if kind == NOTE:
+            return self.notes[code]
+        if kind == EVENT:
+            return f"{outcome} {table.type_names[detail]}: {table.event_names[code]}"
+        if kind == PROGRESS:
+            return f"{name} has progressed to the {config.Tech_eras[code]} era."
+        if kind == REGRESS:
+            return f"{name} has regressed back to the {config.Tech_eras[code]} era."
+        if kind == GAIN_TRAIT:
+            return f"{name} has gained a new trait: {trait_names[code]}"
+        if kind == LOSE_TRAIT:
+            return f"{name} has lost a trait: {trait_names[code]}"
+        if kind == INTERACTION:
+            return f"{name} interacted with {counterpart_name} {outcome}ly: {table.event_names[code]}"
+        if kind == EXCHANGE:
+            return (f"Repeated positive exposure has resulted in a cultural exchange between {name} and {counterpart_name}.\n"
+                    f"{name} received the {trait_names[code]} trait from {counterpart_name} and "
+                    f"{counterpart_name} received the {trait_names[detail]} trait from {name}.")
+        raise ValueError(f"Unknown record kind {kind}")
+
+    def view(self, channel, civ_id):
+        return HistoryView(self, channel, civ_id)
+
+
+class HistoryView:
+    """
+    One civilization's history on one channel, read as a list of text lines rendered on demand.
+
+    Supports `len`, indexing, slicing and iteration like the list of strings it replaces. `append` adds a
+    free-text line.
+    """
+    def __init__(self, log, channel, civ_id):
+        self.log = log
+        self.channel = channel
+        self.civ_id = civ_id
+
+    def rows(self):
+        return self.log.index.get((self.channel, self.civ_id), array("q"))
+
+    def append(self, text, year=0):
+        self.log.note(self.channel, year, self.civ_id, text)
+
+    def __len__(self):
+        return len(self.rows())
+
+    def __getitem__(self, item):
+        rows = self.rows()
+        if isinstance(item, slice):
+            return [self.log.render(row) for row in rows[item]]
+        return self.log.render(rows[item])
+
+    def __iter__(self):
+        return (self.log.render(row) for row in self.rows())
+
+    def __repr__(self):
+        return f"HistoryView({list(self)!r})"
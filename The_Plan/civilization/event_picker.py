@@ -1,7 +1,89 @@
-import random
+import numpy as np
 import events
+import rng_streams
 
-def select_event(event_type_key=None, exclude_key="Inter-Civilization Interaction"):
+
+class EventTable:
+    """
+    `events.Events` compiled once into flat integer-coded tables.
+
+    Every event name is stored in one flat list, grouped by event type and outcome. `offsets[t, o]` and
+    `counts[t, o]` give the slice holding the events of type id `t` with outcome id `o`, so a batch of events
+    is drawn with a handful of NumPy calls instead of nested dict lookups per event.
+    """
+    outcomes = ["Positive", "Negative"]
+
+    def __init__(self, event_dict):
+        self.type_names = list(event_dict)
+        self.type_index = {name: i for i, name in enumerate(self.type_names)}
+        self.event_names = []
+        self.offsets = np.zeros((len(self.type_names), len(self.outcomes)), dtype=np.int64)
+        self.counts = np.zeros((len(self.type_names), len(self.outcomes)), dtype=np.int64)
+
+        for type_id, type_name in enumerate(self.type_names):
+            for outcome_id, outcome in enumerate(self.outcomes):
+                type_events = event_dict[type_name][outcome]
+                self.offsets[type_id, outcome_id] = len(self.event_names)
+                self.counts[type_id, outcome_id] = len(type_events)
+                self.event_names.extend(type_events)
+
+    def candidate_types(self, event_type_key=None, exclude_key=None):
+        """Type ids eligible for a draw: just `event_type_key` if given, otherwise every type except `exclude_key`."""
+        if event_type_key is not None:
+            return np.array([self.type_index[event_type_key]])
+        return np.array([i for i, name in enumerate(self.type_names) if name != exclude_key])
+
+    def sample(self, n, event_type_key=None, exclude_key="Inter-Civilization Interaction", type_weights=None, rng=None):
+        """
+        Draw `n` events at once.
+
+        Parameters:
+        n (int): Number of events to draw.
+        event_type_key (str, optional): Specific event type to draw from.
+        exclude_key (str, optional): Event type to exclude when drawing from all types.
+        type_weights (dict, optional): Relative weight per event type name; unlisted types weigh 1.
+        rng (np.random.Generator or random.Random, optional): Random generator, the `random` module by default.
+
+        Returns:
+        tuple: Arrays of type ids, outcome ids and flat event ids, each of length `n`.
+        """
+        rng = rng_streams.as_numpy_rng(rng)
+        candidates = self.candidate_types(event_type_key, exclude_key)
+
+        if type_weights and len(candidates) > 1:
+            weights = np.array([type_weights.get(self.type_names[i], 1.0) for i in candidates], dtype=float)
+            type_ids = rng.choice(candidates, size=n, p=weights / weights.sum())
+        else:
+            type_ids = candidates[rng.integers(0, len(candidates), size=n)]
+        outcome_ids = rng.integers(0, len(self.outcomes), size=n)
+        counts = self.counts[type_ids, outcome_ids]
+        event_ids = self.offsets[type_ids, outcome_ids] + (rng.random(n) * counts).astype(np.int64)
+        return type_ids, outcome_ids, event_ids
+
+    def describe(self, type_id, outcome_id, event_id):
+        """Expand integer codes into the event dict returned by `select_event`."""
+        return {
+            "EventType": self.type_names[type_id],
+            "Outcome": self.outcomes[outcome_id],
+            "Event": self.event_names[event_id],
+        }
+
+
+event_table = EventTable(events.Events)
+
+
+def select_events(n, event_type_key=None, exclude_key="Inter-Civilization Interaction", type_weights=None, rng=None):
+    """
+    Selects `n` random events in one batch. See `select_event` for the parameters.
+
+    Returns:
+    list: `n` dictionaries containing the event type, outcome, and name.
+    """
+    type_ids, outcome_ids, event_ids = event_table.sample(n, event_type_key, exclude_key, type_weights, rng)
+    return [event_table.describe(*codes) for codes in zip(type_ids, outcome_ids, event_ids)]
+
+
+def select_event(event_type_key=None, exclude_key="Inter-Civilization Interaction", type_weights=None, rng=None):
     """
     Selects a random event. If `event_type_key` is specified, selects from that type.
     If not, selects from all event types, optionally excluding a specific key.
@@ -9,17 +91,10 @@ def select_event(event_type_key=None, exclude_key="Inter-Civilization Interactio
     Parameters:
     event_type_key (str, optional): Specific event type to select from.
     exclude_key (str, optional): Event type to exclude when selecting randomly.
+    type_weights (dict, optional): Relative weight per event type name when selecting randomly.
+    rng (np.random.Generator or random.Random, optional): Random generator to draw with.
 
     Returns:
     dict: A dictionary containing the event type, outcome, and name.
     """
-    if event_type_key is None:
-        event_type_keys = [key for key in events.Events if key != exclude_key]
-        event_type_key = random.choice(event_type_keys)
-
-    event_type = events.Events[event_type_key]
-    return {
-        "EventType": event_type_key,
-        "Outcome": (outcome := random.choice(["Positive", "Negative"])),
-        "Event": random.choice(event_type[outcome]),
-    }
+    return select_events(1, event_type_key, exclude_key, type_weights, rng)[0]
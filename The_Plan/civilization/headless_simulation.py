@@ -0,0 +1,202 @@
+import random
+import numpy as np
+import config
+import event_picker
+import rng_streams
+import trait_registry
+from map_generation import TERRAIN_MASK
+
+
+class HeadlessSimulation:
+    """
+    LLM-free simulation core that keeps every civilization's state in NumPy arrays.
+
+    Tech levels, trait membership, per-type event counts and positive/negative tallies are stored as one
+    array per field (one row per civilization), and each age advances all civilizations with vectorized ops.
+    Event, progress and regress probabilities follow `Civilization.progress_history`, `progress_era` and
+    `regress_era`; neighbor interactions and text history are not simulated. Results can be exported back
+    into `Civilization` objects on demand.
+    """
+    max_tech_level = len(config.Tech_eras)
+    event_table = event_picker.event_table
+    # Event type ids drawn during an age, one event_counts column each
+    event_type_ids = event_table.candidate_types(exclude_key="Inter-Civilization Interaction")
+
+    def __init__(self, terrain_types, locations, traits, tech_levels=None, names=None, civilizations=None, rng=None):
+        """
+        Parameters:
+        terrain_types (array_like): Terrain class of each civilization.
+        locations (array_like): (n, 2) array of map locations.
+        traits (list): Trait names of each civilization, as lists or TraitSets.
+        tech_levels (array_like, optional): Starting tech level of each civilization, 0 by default.
+        names (list, optional): Civilization names, generated if not provided.
+        civilizations (list, optional): Civilization objects the state was read from, updated by `export`.
+        rng (np.random.Generator, optional): Random generator, seeded from `random` by default.
+        """
+        self.rng = rng_streams.as_numpy_rng(rng)
+        self.size = len(terrain_types)
+        self.terrain_types = np.asarray(terrain_types, dtype=np.uint8)
+        self.locations = np.asarray(locations, dtype=np.int32).reshape(self.size, 2)
+        self.names = names or [f"Civilization {i}" for i in range(self.size)]
+        self.civilizations = civilizations
+
+        # Columns are ids in the shared trait registry
+        trait_ids = [[trait_registry.registry.intern(trait) for trait in civ_traits] for civ_traits in traits]
+        self.trait_names = list(trait_registry.registry.names)
+        self.trait_index = trait_registry.registry.ids
+        self.traits = np.zeros((self.size, len(self.trait_names)), dtype=bool)
+        for row, civ_trait_ids in enumerate(trait_ids):
+            self.traits[row, civ_trait_ids] = True
+        self.progression_trait_ids = np.array([self.trait_index[trait] for trait in config.progression_traits])
+
+        self.tech_levels = np.zeros(self.size, dtype=np.int16) if tech_levels is None else np.asarray(tech_levels, dtype=np.int16)
+        self.event_counts = np.zeros((self.size, len(self.event_type_ids)), dtype=np.int32)
+        self.event_columns = np.full(len(self.event_table.type_names), -1)
+        self.event_columns[self.event_type_ids] = np.arange(len(self.event_type_ids))
+        self.positive_outcomes = np.zeros(self.size, dtype=np.int64)
+        self.negative_outcomes = np.zeros(self.size, dtype=np.int64)
+
+        self.event_limit = config.Cvilization_Class_config["Event_Limit"]
+        self.current_year = config.Cvilization_Class_config["Starting_Year"]
+        self.year_progression = config.Cvilization_Class_config["Year_Progression"]
+        self.speed_multiplier = config.Cvilization_Class_config["Speed_Multiplier"]
+        self.ages = 0
+
+    @classmethod
+    def from_map(cls, terrain, civs, rng=None):
+        """Found `civs` civilizations at random free cells of a TerrainMap, with traits assigned like `Civilization.assign_traits`."""
+        rng = rng_streams.as_numpy_rng(rng)
+        picker = random.Random(int(rng.integers(2 ** 63)))
+        occupancy = terrain.create_occupancy()
+        locations = []
+        for _ in range(civs):
+            location = occupancy.random_free_cell(rng=picker)
+            if location is None:
+                raise ValueError(f"The map only has room for {len(locations)} civilizations.")
+            occupancy.occupy(*location, civ_id=len(locations))
+            locations.append(location)
+        locations = np.array(locations, dtype=np.int32).reshape(civs, 2)
+        terrain_types = np.asarray(terrain.layers[locations[:, 0], locations[:, 1]]) & TERRAIN_MASK
+
+        thresholds = config.Terrain_Feature_config
+        distance_to_water = terrain.distance_to_water[locations[:, 0], locations[:, 1]]
+        distance_to_mountains = terrain.distance_to_mountains[locations[:, 0], locations[:, 1]]
+        forest_density = terrain.forest_density[locations[:, 0], locations[:, 1]]
+        coastal = (terrain_types != 0) & (distance_to_water <= thresholds["Coastal_Distance"])
+        mountainous = (terrain_types != 3) & (distance_to_mountains <= thresholds["Mountain_Distance"])
+        forested = forest_density >= thresholds["Forest_Density"]
+
+        traits = []
+        for i, terrain_type in enumerate(terrain_types):
+            civ_traits = list(config.base_traits.get(int(terrain_type), ["Undefined"]))
+            for surrounding, borders in ((0, coastal[i]), (3, mountainous[i]), (4, forested[i])):
+                if borders:
+                    civ_traits.append(picker.choice(config.base_traits[surrounding]))
+            civ_traits.append(picker.choice(config.founding_traits))
+            traits.append(civ_traits)
+        return cls(terrain_types, locations, traits, rng=rng)
+
+    @classmethod
+    def from_civilizations(cls, civilizations, rng=None):
+        """Load the state of existing Civilization objects, which `export` will later update in place."""
+        return cls(
+            terrain_types=[civ.terrain_type for civ in civilizations],
+            locations=[civ.location for civ in civilizations],
+            traits=[civ.traits for civ in civilizations],
+            tech_levels=[civ.tech_level for civ in civilizations],
+            names=[civ.name for civ in civilizations],
+            civilizations=list(civilizations),
+            rng=rng,
+        )
+
+    def remove_random_traits(self, rows):
+        """Remove one uniformly chosen trait from each of the given civilizations."""
+        if len(rows) == 0:
+            return
+        keys = np.where(self.traits[rows], self.rng.random((len(rows), self.traits.shape[1])), -1.0)
+        self.traits[rows, np.argmax(keys, axis=1)] = False
+
+    def progress_era(self, rows):
+        """Vectorized `Civilization.progress_era` for the given civilizations."""
+        advancing = rows[self.tech_levels[rows] < self.max_tech_level - 1]
+        self.tech_levels[advancing] += 1
+
+        # 30% chance to gain a new trait
+        gaining = rows[self.rng.random(len(rows)) > 0.7]
+        new_traits = self.progression_trait_ids[self.rng.integers(0, len(self.progression_trait_ids), len(gaining))]
+        self.traits[gaining, new_traits] = True
+
+        # 30% chance to lose a random trait
+        losing = rows[(self.traits[rows].sum(axis=1) > 3) & (self.rng.random(len(rows)) > 0.7)]
+        self.remove_random_traits(losing)
+
+    def regress_era(self, rows):
+        """Vectorized `Civilization.regress_era` for the given civilizations."""
+        regressing = rows[self.tech_levels[rows] > 1]
+        self.tech_levels[regressing] -= 1
+
+        # 50% chance to lose a trait
+        losing = rows[(self.traits[rows].sum(axis=1) > 3) & (self.rng.random(len(rows)) > 0.5)]
+        self.remove_random_traits(losing)
+
+    def advance_age(self):
+        """Advance every civilization through one age, like `Civilization.progress_history`."""
+        type_ids, outcome_ids, _ = self.event_table.sample(self.size * self.event_limit, rng=self.rng)
+        positive = (outcome_ids == 0).reshape(self.size, self.event_limit)
+
+        rows = np.repeat(np.arange(self.size), self.event_limit)
+        columns = self.event_columns[type_ids]
+        self.event_counts += np.bincount(rows * len(self.event_type_ids) + columns,
+                                         minlength=self.event_counts.size).reshape(self.event_counts.shape).astype(np.int32)
+        positive_outcomes = positive.sum(axis=1)
+        negative_outcomes = self.event_limit - positive_outcomes
+        self.positive_outcomes += positive_outcomes
+        self.negative_outcomes += negative_outcomes
+
+        # 30% chance to progress or regress the era, depending on which outcomes dominated
+        shifting = self.rng.random(self.size) < 0.3
+        self.progress_era(np.flatnonzero(shifting & (positive_outcomes > negative_outcomes)))
+        self.regress_era(np.flatnonzero(shifting & (negative_outcomes > positive_outcomes)))
+
+        # Same year progression as World.calculate_year_progression
+        self.current_year += self.year_progression
+        average_tech_level = self.tech_levels.mean() if self.size else 0
+        self.year_progression = max(1, int(50 / (average_tech_level / self.max_tech_level + 0.5))) * self.speed_multiplier
+        self.ages += 1
+
+    def run(self, ages=5):
+        """Advance every civilization through `ages` ages."""
+        for _ in range(ages):
+            self.advance_age()
+        return self
+
+    def traits_of(self, row):
+        return [self.trait_names[i] for i in np.flatnonzero(self.traits[row])]
+
+    def export(self, rows=None, world=None):
+        """
+        Write the simulated state into Civilization objects and return them.
+
+        If the simulation was loaded with `from_civilizations`, those objects are updated in place.
+        Otherwise a Civilization is founded in `world` for each requested row at its simulated location.
+        """
+        from civilization import Civilization
+
+        rows = range(self.size) if rows is None else rows
+        exported = []
+        for row in rows:
+            if self.civilizations is not None:
+                civ = self.civilizations[row]
+            elif world is None:
+                raise ValueError("A World is needed to found the exported civilizations.")
+            else:
+                civ = Civilization(world, name=self.names[row], location=tuple(int(v) for v in self.locations[row]))
+            civ.tech_level = int(self.tech_levels[row])
+            civ.traits = trait_registry.TraitSet.from_ids(np.flatnonzero(self.traits[row]))
+            civ.cultural_context = civ.generate_cultural_context()
+            civ.history.append(
+                f"Over {self.ages} ages {civ.name} saw {self.positive_outcomes[row]} positive and "
+                f"{self.negative_outcomes[row]} negative events, reaching the {config.Tech_eras[civ.tech_level]} era."
+            )
+            exported.append(civ)
+        return exported
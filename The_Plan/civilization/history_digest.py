@@ -0,0 +1,85 @@
+from llm_client import ChatRequest
+from tokens import count_tokens
+
+
+class HistoryDigest:
+    """
+    Bounded view of a civilization's per-age summaries, for putting its history into prompts.
+
+    The most recent summaries are kept verbatim; older ones are folded into era summaries whenever the
+    history would take more than `token_budget` tokens, and once there are several eras they are folded
+    together in turn. Prompt size stays roughly flat however many ages a run lasts. The full list of
+    per-age summaries (`summaries`, shared with the civilization) is left untouched.
+
+    Folding needs a summary from the generation backend: `fold_request` returns the request to send and
+    `apply_fold` takes its response, so a World can fold every civilization's history in one batch.
+    """
+    def __init__(self, summaries, token_budget=1200, keep_recent=3, era_max_tokens=250, model="gpt-3.5-turbo"):
+        self.summaries = summaries
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.era_max_tokens = era_max_tokens
+        self.model = model
+        # Era summaries, oldest first, and how many of the per-age summaries they cover
+        self.eras = []
+        self.folded = 0
+        # ("ages" or "eras", how many) for the fold requested but not applied yet
+        self.pending = None
+
+    def lines(self):
+        """The history as it goes into a prompt: era summaries, then the recent per-age summaries."""
+        return self.eras + self.summaries[self.folded:]
+
+    def tokens(self):
+        return count_tokens("; ".join(self.lines()), self.model)
+
+    def fold_request(self):
+        """
+        The ChatRequest condensing the oldest part of the history, or None if it fits in the budget
+        or nothing is left to fold.
+        """
+        if self.tokens() <= self.token_budget:
+            return None
+        unfolded = len(self.summaries) - self.folded
+        if unfolded > self.keep_recent:
+            self.pending = ("ages", unfolded - self.keep_recent)
+            periods = self.summaries[self.folded:self.folded + self.pending[1]]
+        elif len(self.eras) > 1:
+            self.pending = ("eras", len(self.eras))
+            periods = self.eras
+        else:
+            return None
+
+        prompt = f"""
+                Condense the following consecutive periods of a civilization's history into a single summary of the era
+                they make up. Keep the advancements and regressions, the key positive and negative events and their lasting
+                impacts on the society, in chronological order. Here are the periods:
+
+                {'; '.join(periods)}
+
+                Write the summary as if it is a historical account, keeping it brief. Don't use flowery language.
+            """
+        return ChatRequest(prompt, self.model, self.era_max_tokens, 0.5)
+
+    def apply_fold(self, response):
+        """Replace the periods of the pending fold with its summary. Failed folds are retried next time."""
+        kind, count = self.pending
+        self.pending = None
+        if isinstance(response, Exception):
+            return False
+        era = response.strip()
+        if kind == "ages":
+            self.eras.append(era)
+            self.folded += count
+        else:
+            self.eras = [era]
+        return True
+
+    def state(self):
+        """JSON-friendly state, for checkpoints."""
+        return {"eras": self.eras, "folded": self.folded}
+
+    def restore(self, state):
+        self.eras = list(state["eras"])
+        self.folded = state["folded"]
+        return self
@@ -0,0 +1,94 @@
+import itertools
+import random
+import misc
+
+
+class InteractionScheduler:
+    """
+    Picks which neighboring civilizations interact during an age.
+
+    Rather than every civilization interacting with every neighbor, a bounded number of distinct neighbor
+    pairs is sampled per age: a civilization is drawn in proportion to its neighbor count and then one of its
+    neighbors uniformly, which draws every neighbor pair with equal probability. A pair is then kept with
+    probability `weight`, favoring close or friendly pairs. The cost of an age is linear in the number of
+    civilizations plus the pair budget, not quadratic in the civilization count.
+
+    Positive and negative interaction counts are kept per pair across ages and drive the "relationship"
+    weighting. Trait exchanges are earned on separate counters that start over after each exchange.
+    """
+    weightings = (None, "distance", "relationship")
+
+    def __init__(self, pair_budget=16, weighting="distance", distance_scale=10.0, max_attempts=10, exchange_threshold=2):
+        if weighting not in self.weightings:
+            raise ValueError(f"Unknown interaction weighting {weighting!r}, expected one of {self.weightings}")
+        self.pair_budget = pair_budget
+        self.weighting = weighting
+        self.distance_scale = distance_scale
+        self.max_attempts = max_attempts
+        self.exchange_threshold = exchange_threshold
+        # (lower civ id, higher civ id) -> [positive interactions, negative interactions]
+        self.relations = {}
+        # (lower civ id, higher civ id) -> [positive, negative] interactions counting towards the next exchange
+        self.exchange_progress = {}
+
+    @staticmethod
+    def pair_key(civ, neighbor):
+        return (civ.id, neighbor.id) if civ.id < neighbor.id else (neighbor.id, civ.id)
+
+    def relation(self, civ, neighbor):
+        return self.relations.setdefault(self.pair_key(civ, neighbor), [0, 0])
+
+    def weight(self, civ, neighbor):
+        """Probability of keeping a drawn pair, in (0, 1]."""
+        if self.weighting == "distance":
+            return 1.0 / (1.0 + misc.calculate_distance(civ.location, neighbor.location) / self.distance_scale)
+        if self.weighting == "relationship":
+            positive, negative = self.relations.get(self.pair_key(civ, neighbor), (0, 0))
+            return (positive + 1) / (positive + negative + 2)
+        return 1.0
+
+    def sample_pairs(self, civilizations, rng=random):
+        """
+        Draw up to `pair_budget` distinct neighbor pairs.
+
+        Parameters:
+        civilizations (list): Civilizations with their `neighbors` lists filled in.
+        rng (random.Random, optional): Random generator to draw with.
+
+        Returns:
+        list: (civilization, neighbor) tuples, each unordered pair at most once, lower id first.
+        """
+        cumulative = list(itertools.accumulate(len(civ.neighbors) for civ in civilizations))
+        total = cumulative[-1] if cumulative else 0
+        budget = min(self.pair_budget, total // 2)
+
+        pairs = {}
+        for _ in range(budget * self.max_attempts):
+            if len(pairs) >= budget:
+                break
+            civ = rng.choices(civilizations, cum_weights=cumulative)[0]
+            neighbor = rng.choice(civ.neighbors)
+            key = self.pair_key(civ, neighbor)
+            if key not in pairs and rng.random() < self.weight(civ, neighbor):
+                pairs[key] = (civ, neighbor) if civ.id < neighbor.id else (neighbor, civ)
+        return list(pairs.values())
+
+    def interact(self, civ, neighbor, positive):
+        """
+        Count one interaction between a pair. Returns True when repeated positive interactions have earned
+        the pair a cultural exchange, after which its exchange progress starts over; the relationship tallies
+        only ever grow.
+        """
+        key = self.pair_key(civ, neighbor)
+        self.relation(civ, neighbor)[0 if positive else 1] += 1
+        counts = self.exchange_progress.setdefault(key, [0, 0])
+        if not positive:
+            counts[1] += 1
+            return False
+        counts[0] += 1
+        if counts[0] <= self.exchange_threshold:
+            return False
+        # Start over towards the next exchange, still held back by the pair's recent negative interactions
+        counts[0] = max(0, counts[0] - counts[1] - self.exchange_threshold - 1)
+        counts[1] //= 2
+        return True
@@ -0,0 +1,255 @@
+import asyncio
+from collections import namedtuple
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import config
+import profiling
+from response_cache import CacheMissError
+
+# One chat completion: a single user message, its sampling settings and whether it asks for "text", an
+# "artifact" or an "artifact_batch"
+ChatRequest = namedtuple("ChatRequest", ["prompt", "model", "max_tokens", "temperature", "kind"], defaults=["text"])
+
+
+class BackendError(Exception):
+    """A generation backend failed to answer a request; `provider` names the backend."""
+    def __init__(self, provider, message):
+        super().__init__(message)
+        self.provider = provider
+
+
+class OpenAIBackend:
+    """
+    Generation backend calling the OpenAI chat completion API.
+
+    The API key is read from the environment (or a `.env` file) the first time a request is sent, so
+    the simulation can be imported and run offline with another backend.
+    """
+    name = "openai"
+
+    def __init__(self, request_timeout=None):
+        self.request_timeout = request_timeout
+        self.openai = None
+
+    def ready(self):
+        """Check the backend can send requests, raising if it is misconfigured."""
+        self.client()
+
+    def client(self):
+        if self.openai is None:
+            from dotenv import load_dotenv
+            import openai
+
+            load_dotenv()
+            openai.api_key = openai.api_key or os.getenv("OPENAI_API_KEY")
+            if not openai.api_key:
+                raise ValueError("OpenAI API key is not set. Check the '.env' file or the 'OPENAI_API_KEY' variable.")
+            self.openai = openai
+        return self.openai
+
+    def arguments(self, request):
+        return dict(model=request.model, messages=[{"role": "user", "content": request.prompt}],
+                    max_tokens=request.max_tokens, temperature=request.temperature, request_timeout=self.request_timeout)
+
+    def complete(self, request):
+        """Send one request and return the message content."""
+        openai = self.client()
+        try:
+            response = openai.ChatCompletion.create(**self.arguments(request))
+        except openai.error.OpenAIError as e:
+            raise BackendError("OpenAI", e) from e
+        return response["choices"][0]["message"]["content"]
+
+    async def acomplete(self, request):
+        openai = self.client()
+        try:
+            response = await openai.ChatCompletion.acreate(**self.arguments(request))
+        except openai.error.OpenAIError as e:
+            raise BackendError("OpenAI", e) from e
+        return response["choices"][0]["message"]["content"]
+
+
+class StubBackend:
+    """
+    Offline, deterministic generation backend for load tests and benchmarks.
+
+    Each response is derived from a hash of the request and `seed`, so a seeded simulation produces the same
+    artifacts on every run without any network access. Artifacts are valid JSON with the fields of
+    `config.json_format`, batched artifacts a JSON array of them; summaries are short plain text. `latency` seconds (plus up to `jitter` more) are
+    spent per request, and `failure_rate` of requests fail with a BackendError.
+    """
+    name = "stub"
+    words = ["ancient", "river", "stone", "harvest", "ritual", "bronze", "ancestor", "trade", "storm", "council",
+             "festival", "border", "mountain", "woven", "sacred", "iron", "song", "market", "fortress", "star"]
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    def ready(self):
+        pass
+
+    def rng(self, request):
+        digest = hashlib.sha256(f"{self.seed}\0{request.model}\0{request.kind}\0{request.prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "little"))
+
+    def delay(self, rng):
+        return self.latency + rng.uniform(0, self.jitter) if self.jitter else self.latency
+
+    def respond(self, request, rng):
+        if rng.random() < self.failure_rate:
+            raise BackendError("Stub", "synthetic failure")
+
+        if request.kind == "artifact":
+            return json.dumps(self.artifact(request.prompt, rng))
+        if request.kind == "artifact_batch":
+            # One artifact per "Civilization N:" section, some of them malformed at the failure rate
+            artifacts = [self.artifact(section, rng) for section in re.split(r"Civilization \d+:", request.prompt)[1:]]
+            for artifact in artifacts:
+                if rng.random() < self.failure_rate:
+                    del artifact["Purpose"]
+            return json.dumps(artifacts)
+        return f"An age of {self.phrase(rng, 3)}, shaped by {self.phrase(rng, 4)}."
+
+    def phrase(self, rng, count):
+        return " ".join(rng.choice(self.words) for _ in range(count))
+
+    def artifact(self, prompt, rng):
+        """An artifact with the `config.json_format` fields for the civilization described in `prompt`."""
+        artifact_type = re.search(r"of type '([^']*)'", prompt)
+        artifact_type = artifact_type.group(1) if artifact_type else "Artifact"
+        civ_name = re.search(r"Civilization Name: (.*)", prompt)
+        civ_name = civ_name.group(1).strip() if civ_name else "an unnamed people"
+        return {
+            "Name": f"The {self.phrase(rng, 2).title()} {artifact_type}",
+            "Description": f"A {artifact_type.lower()} of {civ_name}, marked with {self.phrase(rng, 3)} motifs.",
+            "Purpose": f"Used in {self.phrase(rng, 2)} practices.",
+        }
+
+    def complete(self, request):
+        rng = self.rng(request)
+        time.sleep(self.delay(rng))
+        return self.respond(request, rng)
+
+    async def acomplete(self, request):
+        rng = self.rng(request)
+        await asyncio.sleep(self.delay(rng))
+        return self.respond(request, rng)
+
+
+def make_backend(name=None):
+    """Build the generation backend named in LLM_config ("openai" or "stub")."""
+    name = name or config.LLM_config["Backend"]
+    if name == "openai":
+        return OpenAIBackend(request_timeout=config.LLM_config["Request_Timeout"])
+    if name == "stub":
+        return StubBackend(latency=config.LLM_config["Stub_Latency"], jitter=config.LLM_config["Stub_Jitter"],
+                           failure_rate=config.LLM_config["Stub_Failure_Rate"])
+    raise ValueError(f"Unknown generation backend {name!r}, expected 'openai' or 'stub'")
+
+
+class LLMClient:
+    """
+    Client a World's civilizations send their summaries and artifact requests through, to a generation
+    `backend`: OpenAIBackend, StubBackend or anything else with a `name` and `ready`, `complete` and
+    `acomplete` methods.
+
+    `complete` blocks for one request. `complete_all` sends a batch concurrently on an asyncio event loop,
+    with at most `max_concurrency` requests in flight, and returns the message contents in request order.
+    A failed request yields its exception in place of the content, so one error doesn't lose the rest of
+    the batch.
+
+    With a `cache` (see response_cache.ResponseCache) requests already answered are served from it, and
+    with `cache_only` a request missing from the cache raises CacheMissError instead of calling the backend.
+    """
+    def __init__(self, backend=None, max_concurrency=8, cache=None, cache_only=False, timer=None):
+        self.backend = backend or OpenAIBackend()
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.cache_only = cache_only
+        if cache_only and cache is None:
+            raise ValueError("cache_only needs a response cache to replay from.")
+        self.timer = timer or profiling.default_timer
+
+    def lookup(self, requests):
+        """Cached content of each request, None for misses. Raises CacheMissError on a miss in cache-only mode."""
+        cached = [self.cache.get(request, self.backend.name) for request in requests] if self.cache is not None else [None] * len(requests)
+        misses = sum(content is None for content in cached)
+        self.timer.count("llm_cache.hits", len(requests) - misses)
+        self.timer.count("llm_cache.misses", misses)
+        if misses and self.cache_only:
+            raise CacheMissError(f"{misses} of {len(requests)} requests are not in the response cache {self.cache.path}")
+        return cached
+
+    def store(self, request, content):
+        self.timer.count("llm_requests.sent")
+        if self.cache is not None and not isinstance(content, Exception):
+            self.cache.put(request, content, self.backend.name)
+
+    def complete(self, request):
+        """Send one request, unless it is cached, and return the message content."""
+        content = self.lookup([request])[0]
+        if content is None:
+            self.backend.ready()
+            content = self.backend.complete(request)
+            self.store(request, content)
+        return content
+
+    async def acomplete(self, request, semaphore):
+        async with semaphore:
+            return await self.backend.acomplete(request)
+
+    async def gather(self, requests):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self.acomplete(request, semaphore) for request in requests),
+                                    return_exceptions=True)
+
+    def complete_all(self, requests):
+        """
+        Send a batch of requests concurrently.
+
+        Parameters:
+        requests (list): ChatRequests.
+
+        Returns:
+        list: The message content of each request, or the exception it raised, in request order.
+        """
+        requests = list(requests)
+        contents = self.lookup(requests)
+        misses = [index for index, content in enumerate(contents) if content is None]
+        if not misses:
+            return contents
+
+        self.backend.ready()
+        if self.max_concurrency == 1:
+            responses = [self.try_send(requests[index]) for index in misses]
+        else:
+            responses = asyncio.run(self.gather([requests[index] for index in misses]))
+        for index, content in zip(misses, responses):
+            self.store(requests[index], content)
+            contents[index] = content
+        return contents
+
+    def try_send(self, request):
+        try:
+            return self.backend.complete(request)
+        except Exception as e:
+            return e
+
+    def try_complete(self, request):
+        """
+        Like `complete`, but returns the exception a failed request raised. Cache misses in cache-only mode
+        and backend misconfiguration still raise.
+        """
+        try:
+            return self.complete(request)
+        except (CacheMissError, ValueError):
+            raise
+        except Exception as e:
+            return e
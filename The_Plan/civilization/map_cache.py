@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+import config
+
+# Bump whenever map generation changes in a way that makes previously cached maps stale.
+CACHE_FORMAT_VERSION = 4
+
+
+class TerrainMapCache:
+    """
+    Content-addressed on-disk cache of generated terrain layers.
+
+    Each map is stored as a compressed `.npz` named after a hash of the parameters that produced it.
+    Hits refresh the file's modification time, and whenever the cache grows past `max_bytes` the
+    least recently used maps are evicted.
+    """
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = cache_dir or config.Terrain_Map_config["Cache_Dir"]
+        self.max_bytes = max_bytes if max_bytes is not None else config.Terrain_Map_config["Max_Cache_Bytes"]
+
+    @staticmethod
+    def make_key(params):
+        """Hash a dict of generation parameters into a cache key."""
+        payload = json.dumps({"version": CACHE_FORMAT_VERSION, **params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key):
+        """Return the cached layers for `key` as a dict of arrays, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            with np.load(path) as data:
+                layers = {name: data[name] for name in data.files}
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        os.utime(path)
+        return layers
+
+    def save(self, key, layers):
+        """Store a dict of arrays under `key`, then evict old entries if the cache is over budget."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self.path_for(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            np.savez_compressed(file, **layers)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used maps until the cache fits in `max_bytes`."""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".npz")]
+        except FileNotFoundError:
+            return
+        entries = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove every cached map."""
+        for entry in os.scandir(self.cache_dir) if os.path.isdir(self.cache_dir) else []:
+            if entry.name.endswith(".npz"):
+                os.remove(entry.path)
+
+
+
+class PreloadedLayers:
+    """Cache stand-in that hands back layers already in memory, used to rebuild a saved map without regenerating it."""
+    def __init__(self, layers):
+        self.layers = layers
+
+    def load(self, key):
+        return self.layers
+
+    def save(self, key, layers):
+        pass
+
+
+default_cache = TerrainMapCache()
@@ -1,37 +1,410 @@
 import numpy as np
 # import pygame
+import os
 import random
-from noise import pnoise2
-from scipy.ndimage import gaussian_filter
+import shutil
+import tempfile
+import weakref
+from scipy.ndimage import gaussian_filter, distance_transform_edt, uniform_filter
+from perlin import pnoise2_grid
+import config
+import map_cache
+import profiling
+import rng_streams
+
+# Terrain and forest share one uint8 layer: the low bits hold the terrain class, a flag bit marks forest
+TERRAIN_MASK = 0x0F
+FOREST_FLAG = 0x10
+# Value forests have in the expanded `forest_map` view
+FOREST = 4
+
+# 4-connected neighbour offsets used when growing forests
+DIRECTION_OFFSETS = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)])
+
+
+def grow_forests(layers, possible_positions, num_forests, min_forest_size=5, max_forest_size=15, rng=None):
+    """
+    Grow `num_forests` irregular forest patches from random seeds in `possible_positions`, avoiding mountains,
+    by setting FOREST_FLAG on their cells in the terrain `layers` array.
+
+    All patches grow together, one breadth-first ring per round, from a frontier of the cells they claimed in the
+    previous round. Each cell is claimed by at most one patch and enters the frontier at most once, so the work is
+    bounded by the number of forest cells. A patch boxed in by mountains, map edges or other forests simply stops
+    short of its target size once its frontier is exhausted.
+    """
+    if num_forests <= 0 or len(possible_positions[0]) == 0:
+        return
+    rng = rng_streams.as_numpy_rng(rng)
+
+    rows, cols = layers.shape
+    passable = ((np.asarray(layers) & TERRAIN_MASK) != 3).ravel()
+    owner = np.full(rows * cols, -1, dtype=np.int32)
+
+    # Randomly pick a starting point and a target size for every patch
+    start_idx = rng.integers(0, len(possible_positions[0]), size=num_forests)
+    start_cells = np.asarray(possible_positions[0])[start_idx] * cols + np.asarray(possible_positions[1])[start_idx]
+    forest_sizes = rng.integers(min_forest_size, max_forest_size + 1, size=num_forests)
+
+    # Patches seeded on an already claimed cell are dropped
+    start_cells, first = np.unique(start_cells, return_index=True)
+    patches = first.astype(np.int32)
+    owner[start_cells] = patches
+    grown = np.zeros(num_forests, dtype=np.int64)
+    grown[patches] = 1
+
+    frontier_cells, frontier_patches = start_cells, patches
+    while len(frontier_cells):
+        # Only patches still below their target size keep growing
+        growing = grown[frontier_patches] < forest_sizes[frontier_patches]
+        frontier_cells, frontier_patches = frontier_cells[growing], frontier_patches[growing]
+
+        # Expand every frontier cell in all four directions
+        x = (frontier_cells // cols)[:, None] + DIRECTION_OFFSETS[:, 0]
+        y = (frontier_cells % cols)[:, None] + DIRECTION_OFFSETS[:, 1]
+        candidate_patches = np.repeat(frontier_patches, len(DIRECTION_OFFSETS))
+        x, y = x.ravel(), y.ravel()
+        in_bounds = (x >= 0) & (x < rows) & (y >= 0) & (y < cols)
+        candidate_cells = x[in_bounds] * cols + y[in_bounds]
+        candidate_patches = candidate_patches[in_bounds]
+
+        free = passable[candidate_cells] & (owner[candidate_cells] == -1)
+        candidate_cells, candidate_patches = candidate_cells[free], candidate_patches[free]
+
+        # Shuffle so growth direction is random, then let one random patch claim each contested cell
+        order = rng.permutation(len(candidate_cells))
+        candidate_cells, candidate_patches = candidate_cells[order], candidate_patches[order]
+        candidate_cells, first = np.unique(candidate_cells, return_index=True)
+        candidate_patches = candidate_patches[first]
+
+        # Cap each patch at its remaining size
+        order = rng.permutation(len(candidate_cells))
+        order = order[np.argsort(candidate_patches[order], kind="stable")]
+        candidate_cells, candidate_patches = candidate_cells[order], candidate_patches[order]
+        group_start = np.searchsorted(candidate_patches, candidate_patches, side="left")
+        rank = np.arange(len(candidate_patches)) - group_start
+        keep = rank < (forest_sizes - grown)[candidate_patches]
+
+        frontier_cells, frontier_patches = candidate_cells[keep], candidate_patches[keep]
+        owner[frontier_cells] = frontier_patches
+        grown += np.bincount(frontier_patches, minlength=num_forests)
+
+    # Flag forest cells in the terrain layer
+    forest_rows, forest_cols = np.divmod(np.flatnonzero(owner >= 0), cols)
+    layers[forest_rows, forest_cols] |= FOREST_FLAG
+
+
+def capped_distance(mask, max_distance):
+    """Euclidean distance from every cell to the nearest cell where `mask` is True, capped at `max_distance`."""
+    if not mask.any():
+        return np.full(mask.shape, max_distance, dtype=np.float32)
+    return np.minimum(distance_transform_edt(~mask), max_distance).astype(np.float32)
+
+
+def feature_fields(layers, normalized_map, window=5, max_distance=64):
+    """
+    Compute per-cell terrain features for a terrain layer and its normalized height map.
+
+    Returns:
+    dict: float32 arrays for distance to water, distance to mountains, ruggedness (local standard deviation
+    of height over a `window` x `window` neighborhood) and forest density (forest fraction of that neighborhood).
+    """
+    terrain = layers & TERRAIN_MASK
+    height = np.asarray(normalized_map, dtype=np.float32)
+    mean = uniform_filter(height, size=window)
+    mean_of_squares = uniform_filter(height * height, size=window)
+    return {
+        "distance_to_water": capped_distance(terrain == 0, max_distance),
+        "distance_to_mountains": capped_distance(terrain == 3, max_distance),
+        "ruggedness": np.sqrt(np.maximum(mean_of_squares - mean * mean, 0)).astype(np.float32),
+        "forest_density": uniform_filter((layers & FOREST_FLAG).astype(bool).astype(np.float32), size=window),
+    }
+
+
+class OccupancyIndex:
+    """
+    Tracks which civilization, by id, holds each map cell in an int32 grid (-1 for free cells).
+
+    Free cells are kept in one swap-remove pool per terrain class, alongside each cell's slot in its pool.
+    Drawing a random free cell (optionally restricted to some terrain classes), occupying a cell and
+    releasing it are all O(1), and a draw always succeeds while a matching free cell remains.
+    """
+    def __init__(self, terrain_map):
+        self.shape = terrain_map.shape
+        self.civ_ids = np.full(self.shape, -1, dtype=np.int32)
+        self.cell_terrain = np.asarray(terrain_map).ravel()
+        index_dtype = np.int32 if self.cell_terrain.size < 2 ** 31 else np.int64
+        self.slot = np.empty(self.cell_terrain.size, dtype=index_dtype)
+        self.pools = {}
+        self.pool_sizes = {}
+        for terrain, count in enumerate(np.bincount(self.cell_terrain)):
+            if count == 0:
+                continue
+            cells = np.flatnonzero(self.cell_terrain == terrain).astype(index_dtype)
+            self.pools[terrain] = cells
+            self.pool_sizes[terrain] = len(cells)
+            self.slot[cells] = np.arange(len(cells), dtype=index_dtype)
+
+    def free_count(self, terrain_classes=None):
+        """Number of free cells, optionally only counting the given terrain classes."""
+        if terrain_classes is None:
+            terrain_classes = self.pool_sizes.keys()
+        return sum(self.pool_sizes.get(terrain, 0) for terrain in terrain_classes)
+
+    def is_free(self, x, y):
+        return self.civ_ids[x, y] < 0
+
+    def owner(self, x, y):
+        """Id of the civilization at (x, y), or None if the cell is free."""
+        civ_id = int(self.civ_ids[x, y])
+        return civ_id if civ_id >= 0 else None
+
+    def occupy(self, x, y, civ_id=0):
+        """Mark a free cell as held by `civ_id`. Returns False if it was already occupied."""
+        if not self.is_free(x, y):
+            return False
+        cell = x * self.shape[1] + y
+        terrain = int(self.cell_terrain[cell])
+        pool = self.pools[terrain]
+
+        # Swap the cell with the last free cell of its pool and shrink the pool
+        last_slot = self.pool_sizes[terrain] - 1
+        cell_slot = self.slot[cell]
+        last_cell = pool[last_slot]
+        pool[cell_slot], pool[last_slot] = last_cell, cell
+        self.slot[last_cell], self.slot[cell] = cell_slot, last_slot
+        self.pool_sizes[terrain] = last_slot
+        self.civ_ids[x, y] = civ_id
+        return True
+
+    def release(self, x, y):
+        """Mark an occupied cell as free again."""
+        if self.is_free(x, y):
+            return
+        cell = x * self.shape[1] + y
+        terrain = int(self.cell_terrain[cell])
+        pool = self.pools[terrain]
+
+        # Swap the cell with the first occupied cell of its pool and grow the pool over it
+        first_slot = self.pool_sizes[terrain]
+        cell_slot = self.slot[cell]
+        first_cell = pool[first_slot]
+        pool[cell_slot], pool[first_slot] = first_cell, cell
+        self.slot[first_cell], self.slot[cell] = cell_slot, first_slot
+        self.pool_sizes[terrain] = first_slot + 1
+        self.civ_ids[x, y] = -1
+
+    def random_free_cell(self, terrain_classes=None, rng=None):
+        """
+        Return a uniformly random free (x, y) cell, optionally of the given terrain classes, or None if there is none.
+        `rng` is a `random.Random`, the `random` module by default.
+        """
+        if terrain_classes is None:
+            terrain_classes = self.pool_sizes.keys()
+        terrain_classes = [terrain for terrain in terrain_classes if self.pool_sizes.get(terrain, 0) > 0]
+        total = sum(self.pool_sizes[terrain] for terrain in terrain_classes)
+        if total == 0:
+            return None
+
+        # One draw over all matching free cells, walked across the per-terrain pools
+        pick = (rng or random).randrange(total)
+        for terrain in terrain_classes:
+            if pick < self.pool_sizes[terrain]:
+                cell = int(self.pools[terrain][pick])
+                return divmod(cell, self.shape[1])
+            pick -= self.pool_sizes[terrain]
+
+
+class SparseOccupancyIndex:
+    """
+    Occupancy index for maps too large to index every cell, such as the memmap layers of a TiledTerrainMap.
+
+    Only occupied cells are stored, in `civ_ids` mapping (x, y) to the civilization id, along with the
+    number of free cells per terrain class. Random free cells are drawn by rejection sampling; when matching
+    cells are too rare for that, one is picked by counting them `band_rows` rows at a time. Draws are
+    uniform either way, as with OccupancyIndex.
+    """
+    def __init__(self, layers, band_rows=1024, max_attempts=1000):
+        self.layers = layers
+        self.shape = layers.shape
+        self.band_rows = band_rows
+        self.max_attempts = max_attempts
+        self.civ_ids = {}
+        counts = np.zeros(TERRAIN_MASK + 1, dtype=np.int64)
+        for row in range(0, self.shape[0], band_rows):
+            band = np.asarray(layers[row:row + band_rows]) & TERRAIN_MASK
+            counts += np.bincount(band.ravel(), minlength=TERRAIN_MASK + 1)
+        self.pool_sizes = {terrain: int(count) for terrain, count in enumerate(counts) if count}
+
+    def free_count(self, terrain_classes=None):
+        """Number of free cells, optionally only counting the given terrain classes."""
+        if terrain_classes is None:
+            terrain_classes = self.pool_sizes.keys()
+        return sum(self.pool_sizes.get(terrain, 0) for terrain in terrain_classes)
+
+    def terrain_at(self, x, y):
+        return int(self.layers[x, y] & TERRAIN_MASK)
+
+    def is_free(self, x, y):
+        return (x, y) not in self.civ_ids
+
+    def owner(self, x, y):
+        """Id of the civilization at (x, y), or None if the cell is free."""
+        return self.civ_ids.get((x, y))
+
+    def occupy(self, x, y, civ_id=0):
+        """Mark a free cell as held by `civ_id`. Returns False if it was already occupied."""
+        if not self.is_free(x, y):
+            return False
+        self.pool_sizes[self.terrain_at(x, y)] -= 1
+        self.civ_ids[(x, y)] = civ_id
+        return True
+
+    def release(self, x, y):
+        """Mark an occupied cell as free again."""
+        if self.civ_ids.pop((x, y), None) is not None:
+            self.pool_sizes[self.terrain_at(x, y)] += 1
+
+    def random_free_cell(self, terrain_classes=None, rng=None):
+        """
+        Return a uniformly random free (x, y) cell, optionally of the given terrain classes, or None if there is none.
+        `rng` is a `random.Random`, the `random` module by default.
+        """
+        rng = rng or random
+        if terrain_classes is None:
+            terrain_classes = self.pool_sizes.keys()
+        terrain_classes = [terrain for terrain in terrain_classes if self.pool_sizes.get(terrain, 0) > 0]
+        total = sum(self.pool_sizes[terrain] for terrain in terrain_classes)
+        if total == 0:
+            return None
+
+        for _ in range(self.max_attempts):
+            x, y = rng.randrange(self.shape[0]), rng.randrange(self.shape[1])
+            if self.terrain_at(x, y) in terrain_classes and self.is_free(x, y):
+                return x, y
+
+        # Matching free cells are rare: one draw over all of them, counted band by band
+        pick = rng.randrange(total)
+        for row in range(0, self.shape[0], self.band_rows):
+            matching = np.isin(np.asarray(self.layers[row:row + self.band_rows]) & TERRAIN_MASK, terrain_classes)
+            for x, y in self.civ_ids:
+                if row <= x < row + self.band_rows:
+                    matching[x - row, y] = False
+            count = int(matching.sum())
+            if pick < count:
+                x, y = divmod(int(np.flatnonzero(matching)[pick]), self.shape[1])
+                return row + x, y
+            pick -= count
+
 
 class TerrainMap:
-    def __init__(self, width=25, height=25, base_scale=40.0, octaves=6, persistence=0.5, lacunarity=2.0, seed=None):
+    # Per-cell terrain features, see feature_fields
+    feature_layers = ("distance_to_water", "distance_to_mountains", "ruggedness", "forest_density")
+    # Layers stored in the map cache
+    cached_layers = ("height_map", "normalized_map", "layers") + feature_layers
+
+    def __init__(self, width=25, height=25, base_scale=40.0, octaves=6, persistence=0.5, lacunarity=2.0, seed=None,
+                 cache=None, rng=None, timer=None, forest_seed=None):
         self.width = width
         self.height = height
         self.base_scale = base_scale
         self.octaves = octaves
         self.persistence = persistence
         self.lacunarity = lacunarity
-        self.seed = seed or random.randint(1, 250)
+        # NumPy Generator for the seed and forest seed, the `random` module if not provided
+        self.rng = rng
+        # PhaseTimer generation steps are reported to
+        self.timer = timer or profiling.default_timer
+        self.seed = seed or (int(rng.integers(1, 251)) if rng is not None else random.randint(1, 250))
+        # Forests grow from their own seed, which is part of the cache key, so a cached map is the same map a
+        # cold cache would generate. Drawn from `rng` if there is one, otherwise the map seed.
+        if forest_seed is None:
+            forest_seed = int(rng.integers(2 ** 63)) if rng is not None else self.seed
+        self.forest_seed = forest_seed
         # self.seed =21
         self.height_map = None
         self.normalized_map = None
-        self.terrain_map = None
-        self.forest_map = None
+        # Terrain class and forest flag per cell, see TERRAIN_MASK and FOREST_FLAG
+        self.layers = None
+        for name in self.feature_layers:
+            setattr(self, name, None)
+        # Use the shared on-disk cache unless one is passed in; cache=False disables caching
+        if cache is None and config.Terrain_Map_config["Cache_Enabled"]:
+            cache = map_cache.default_cache
+        self.cache = cache or None
         self.create_terrain_map()
-        self.civ_map = [[None for _ in range(height)] for _ in range(width)]
+        # Built on first use, see the `occupancy` property
+        self._occupancy = None
+
+    @classmethod
+    def from_layers(cls, layers, **params):
+        """Rebuild a map from its `cached_layers`, e.g. read from a checkpoint, without generating anything."""
+        return cls(cache=map_cache.PreloadedLayers(layers), **params)
+
+    def params(self):
+        """Constructor arguments that reproduce this map."""
+        return {
+            "width": self.width,
+            "height": self.height,
+            "base_scale": self.base_scale,
+            "octaves": self.octaves,
+            "persistence": self.persistence,
+            "lacunarity": self.lacunarity,
+            "seed": self.seed,
+            "forest_seed": self.forest_seed,
+        }
+
+    def create_occupancy(self):
+        """A fresh occupancy index of this map, with every cell free."""
+        return OccupancyIndex(self.terrain_map)
+
+    @property
+    def occupancy(self):
+        """Occupancy index of the civilizations placed on this map, built on first use."""
+        if self._occupancy is None:
+            self._occupancy = self.create_occupancy()
+        return self._occupancy
+
+    @property
+    def civ_map(self):
+        """Id of the civilization on each cell, -1 where there is none."""
+        return self.occupancy.civ_ids
+
+    @property
+    def terrain_map(self):
+        """Terrain class of every cell (0 water, 1 plains, 2 hills, 3 mountains)."""
+        return None if self.layers is None else self.layers & TERRAIN_MASK
+
+    @property
+    def forest_map(self):
+        """Forest layer with FOREST marking forest cells and 0 elsewhere."""
+        return None if self.layers is None else np.where(self.layers & FOREST_FLAG, FOREST, 0).astype(np.uint8)
+
+    def terrain_at(self, x, y):
+        """Terrain class of a single cell, without expanding the whole layer."""
+        return int(self.layers[x, y] & TERRAIN_MASK)
+
+    def is_forest(self, x, y):
+        return bool(self.layers[x, y] & FOREST_FLAG)
+
+    def features_at(self, x, y):
+        """Precomputed terrain features of a single cell."""
+        return {name: float(getattr(self, name)[x, y]) for name in self.feature_layers}
+
+    def placement_score(self, x, y):
+        """Desirability of a cell for founding a civilization: near water, sheltered by forest, not too rugged."""
+        features = self.features_at(x, y)
+        return 1 / (1 + features["distance_to_water"]) + features["forest_density"] - features["ruggedness"]
 
     def generate_height_map(self):
         """Generate a Perlin noise-based height map."""
         x_indices = np.arange(self.height) / self.base_scale
         y_indices = np.arange(self.width) / self.base_scale
-        x_grid, y_grid = np.meshgrid(x_indices, y_indices, indexing='ij')
 
-        self.height_map = np.vectorize(lambda x, y: pnoise2(
-            x, y, octaves=self.octaves, persistence=self.persistence, 
-            lacunarity=self.lacunarity, repeatx=self.width, repeaty=self.height, 
+        self.height_map = pnoise2_grid(
+            x_indices, y_indices, octaves=self.octaves, persistence=self.persistence,
+            lacunarity=self.lacunarity, repeatx=self.width, repeaty=self.height,
             base=self.seed
-        ))(x_grid, y_grid)
+        )
     
     def normalize_map(self):
         """Normalize the height map to a range of [0, 1]."""
@@ -43,65 +416,48 @@ class TerrainMap:
     
     def classify_terrain(self):
         """Classify the terrain based on the normalized height map."""
-        terrain_map = np.zeros_like(self.normalized_map, dtype=int)
+        terrain_map = np.zeros_like(self.normalized_map, dtype=np.uint8)
         terrain_map[self.normalized_map < 0.3] = 0  # Water
         terrain_map[(self.normalized_map >= 0.3) & (self.normalized_map < 0.6)] = 1  # Plains
         terrain_map[(self.normalized_map >= 0.6) & (self.normalized_map < 0.7)] = 2  # Hills
         terrain_map[self.normalized_map >= 0.7] = 3  # Mountains
-        self.terrain_map = terrain_map
+        self.layers = terrain_map
     
     def generate_forests(self, forest_probability=0.1, min_forest_size=5, max_forest_size=15):
         """Generate forests on the map with a limited number and specific size, avoiding mountains."""
-        forest_map = np.zeros_like(self.normalized_map, dtype=int)
-
         # Only consider plains and hills for forest placement
-        possible_positions = np.where((self.terrain_map == 1) | (self.terrain_map == 2))
+        terrain_map = self.terrain_map
+        possible_positions = np.where((terrain_map == 1) | (terrain_map == 2))
 
         # Randomly select a number of positions to generate forests
         num_forests = int(len(possible_positions[0]) * forest_probability)
-        
-        for _ in range(num_forests):
-            # Pick a random starting point from the possible positions (plains and hills only)
-            start_idx = random.randint(0, len(possible_positions[0]) - 1)
-            start_x = possible_positions[0][start_idx]
-            start_y = possible_positions[1][start_idx]
-
-            # Randomly determine the size of the forest patch
-            forest_size = random.randint(min_forest_size, max_forest_size)
-            
-            # Create an irregular, organic shape for the forest
-            forest_cells = [(start_x, start_y)]
-            visited = set(forest_cells)
-            direction_offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-            # Grow the forest by expanding in random directions
-            while len(forest_cells) < forest_size:
-                new_cells = []
-                for x, y in forest_cells:
-                    random.shuffle(direction_offsets)
-                    for dx, dy in direction_offsets:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.height and 0 <= ny < self.width:
-                            if self.terrain_map[nx, ny] != 3 and (nx, ny) not in visited:
-                                new_cells.append((nx, ny))
-                                visited.add((nx, ny))
-
-                if new_cells:
-                    forest_cells.extend(new_cells[:forest_size - len(forest_cells)])
-
-            # Mark forest cells in the forest map
-            for x, y in forest_cells:
-                forest_map[x, y] = 4  # Mark as forest
-        
-        self.forest_map = forest_map
+        grow_forests(self.layers, possible_positions, num_forests, min_forest_size, max_forest_size,
+                     rng=np.random.default_rng(self.forest_seed))
 
     def generate(self, smooth_sigma=3, forest_probability=0.1):
         """Generate the terrain map by chaining all the steps."""
-        self.generate_height_map()
-        self.normalize_map()
-        self.smooth_map(sigma=smooth_sigma)
-        self.classify_terrain()
-        self.generate_forests(forest_probability)
+        timer = self.timer
+        with timer.span("map.generate"):
+            with timer.span("map.height_map"):
+                self.generate_height_map()
+            with timer.span("map.normalize"):
+                self.normalize_map()
+            with timer.span("map.smooth"):
+                self.smooth_map(sigma=smooth_sigma)
+            with timer.span("map.classify"):
+                self.classify_terrain()
+            with timer.span("map.forests"):
+                self.generate_forests(forest_probability)
+            with timer.span("map.features"):
+                self.compute_features()
+
+    def compute_features(self):
+        """Precompute the terrain feature fields used for placement and trait assignment."""
+        fields = feature_fields(self.layers, self.normalized_map,
+                                window=config.Terrain_Feature_config["Window"],
+                                max_distance=config.Terrain_Feature_config["Max_Distance"])
+        for name, field in fields.items():
+            setattr(self, name, field)
 
     # def visualize(self):
     #     """Visualize the terrain map using Pygame."""
@@ -145,11 +501,202 @@ class TerrainMap:
     def get_terrain_map(self):
         return self.terrain_map
 
-    def create_terrain_map(self):
-        self.generate(smooth_sigma=3, forest_probability=0.05)
-        self.get_terrain_map()
+    def cache_key(self, smooth_sigma, forest_probability):
+        """Cache key for this map's generation parameters, including those of its cached feature layers."""
+        return map_cache.TerrainMapCache.make_key({
+            "seed": self.seed,
+            "width": self.width,
+            "height": self.height,
+            "base_scale": self.base_scale,
+            "octaves": self.octaves,
+            "persistence": self.persistence,
+            "lacunarity": self.lacunarity,
+            "sigma": smooth_sigma,
+            "forest_probability": forest_probability,
+            "forest_seed": self.forest_seed,
+            "feature_window": config.Terrain_Feature_config["Window"],
+            "feature_max_distance": config.Terrain_Feature_config["Max_Distance"],
+        })
+
+    def create_terrain_map(self, smooth_sigma=3, forest_probability=0.05):
+        """Load the map from the cache if it was generated before, otherwise generate and cache it."""
+        if self.cache is None:
+            self.generate(smooth_sigma=smooth_sigma, forest_probability=forest_probability)
+            return self.terrain_map
+
+        key = self.cache_key(smooth_sigma, forest_probability)
+        with self.timer.span("map.cache_load"):
+            layers = self.cache.load(key)
+        if layers is not None:
+            self.timer.count("map.cache_hits")
+            for name in self.cached_layers:
+                setattr(self, name, layers[name])
+            return self.terrain_map
+
+        self.generate(smooth_sigma=smooth_sigma, forest_probability=forest_probability)
+        self.cache.save(key, {name: getattr(self, name) for name in self.cached_layers})
         return self.terrain_map
 
+
+class TiledTerrainMap(TerrainMap):
+    """
+    TerrainMap for continent-scale worlds whose layers don't fit comfortably in RAM.
+
+    Every layer is a `np.memmap` file in `store_dir` and each generation step works one tile at a time,
+    so peak memory is a few tiles rather than a few full maps. Smoothing reads each tile with a halo
+    as wide as the Gaussian kernel, so the result is identical to filtering the whole map at once.
+    Civilizations are tracked in a SparseOccupancyIndex rather than a per-cell grid.
+
+    Without a `store_dir` the layers go to a temporary directory, which is deleted by `close` or once the
+    map is garbage collected. A `store_dir` passed in is kept.
+    """
+    def __init__(self, width=25, height=25, base_scale=40.0, octaves=6, persistence=0.5, lacunarity=2.0, seed=None,
+                 tile_size=1024, store_dir=None, rng=None, timer=None, forest_seed=None):
+        self.tile_size = tile_size
+        self.store_dir = store_dir or tempfile.mkdtemp(prefix="cultura_map_")
+        os.makedirs(self.store_dir, exist_ok=True)
+        # Deletes the temporary store; the finalizer holds no reference to the map so it can still be collected
+        self.remove_store = None if store_dir else weakref.finalize(self, shutil.rmtree, self.store_dir, ignore_errors=True)
+        # The memmap store already persists the layers, so they don't go through the map cache
+        super().__init__(width=width, height=height, base_scale=base_scale, octaves=octaves,
+                         persistence=persistence, lacunarity=lacunarity, seed=seed, cache=False, rng=rng, timer=timer,
+                         forest_seed=forest_seed)
+
+    def __getstate__(self):
+        # A pickled copy carries its layers as arrays and leaves the store to this map
+        state = self.__dict__.copy()
+        state["remove_store"] = None
+        return state
+
+    def close(self):
+        """Release the memmap layers and delete the store if it is a temporary one. The map is unusable afterwards."""
+        for name in ("height_map", "normalized_map", "layers") + self.feature_layers:
+            setattr(self, name, None)
+        self._occupancy = None
+        if self.remove_store is not None:
+            self.remove_store()
+
+    def create_occupancy(self):
+        """A fresh sparse occupancy index, so placing civilizations doesn't need a grid the size of the map."""
+        return SparseOccupancyIndex(self.layers, band_rows=self.tile_size)
+
+    def open_layer(self, name, dtype, mode="w+"):
+        """Open (or create) the memmap file backing a map layer."""
+        path = os.path.join(self.store_dir, f"{name}.dat")
+        return np.memmap(path, dtype=dtype, mode=mode, shape=(self.height, self.width))
+
+    def tiles(self, halo=0):
+        """
+        Yield (core, window, inner) slice tuples covering the map tile by tile.
+        `core` is the tile itself, `window` the tile grown by `halo` cells (clipped at the map edges),
+        and `inner` the position of the core inside the window.
+        """
+        for row in range(0, self.height, self.tile_size):
+            for col in range(0, self.width, self.tile_size):
+                row_end = min(row + self.tile_size, self.height)
+                col_end = min(col + self.tile_size, self.width)
+                window_row = max(row - halo, 0)
+                window_col = max(col - halo, 0)
+                window_row_end = min(row_end + halo, self.height)
+                window_col_end = min(col_end + halo, self.width)
+
+                core = (slice(row, row_end), slice(col, col_end))
+                window = (slice(window_row, window_row_end), slice(window_col, window_col_end))
+                inner = (slice(row - window_row, row_end - window_row), slice(col - window_col, col_end - window_col))
+                yield core, window, inner
+
+    def generate_height_map(self):
+        """Generate the Perlin noise height map tile by tile."""
+        x_indices = np.arange(self.height) / self.base_scale
+        y_indices = np.arange(self.width) / self.base_scale
+        self.height_map = self.open_layer("height_map", np.float32)
+
+        for core, _, _ in self.tiles():
+            self.height_map[core] = pnoise2_grid(
+                x_indices[core[0]], y_indices[core[1]], octaves=self.octaves, persistence=self.persistence,
+                lacunarity=self.lacunarity, repeatx=self.width, repeaty=self.height,
+                base=self.seed
+            )
+        self.height_map.flush()
+
+    def normalize_map(self):
+        """Normalize the height map to [0, 1], finding the min/max in a streaming pass over the tiles."""
+        low, high = np.inf, -np.inf
+        for core, _, _ in self.tiles():
+            tile = self.height_map[core]
+            low = min(low, float(tile.min()))
+            high = max(high, float(tile.max()))
+
+        self.normalized_map = self.open_layer("normalized_map", np.float32)
+        for core, _, _ in self.tiles():
+            self.normalized_map[core] = (self.height_map[core] - low) / (high - low)
+        self.normalized_map.flush()
+
+    def smooth_map(self, sigma=2):
+        """Smooth the normalized map tile by tile, reading a halo around each tile so seams are invisible."""
+        # gaussian_filter's kernel radius with its default truncate=4.0
+        halo = int(4.0 * sigma + 0.5)
+        smoothed = self.open_layer("smoothed_map", np.float32)
+
+        for core, window, inner in self.tiles(halo=halo):
+            smoothed[core] = gaussian_filter(np.asarray(self.normalized_map[window]), sigma=sigma)[inner]
+        smoothed.flush()
+
+        # Swap the smoothed layer in as the normalized map
+        del self.normalized_map, smoothed
+        os.replace(os.path.join(self.store_dir, "smoothed_map.dat"), os.path.join(self.store_dir, "normalized_map.dat"))
+        self.normalized_map = self.open_layer("normalized_map", np.float32, mode="r+")
+
+    def classify_terrain(self):
+        """Classify the terrain based on the normalized height map, tile by tile."""
+        self.layers = self.open_layer("layers", np.uint8)
+        for core, _, _ in self.tiles():
+            normalized = self.normalized_map[core]
+            terrain = np.zeros(normalized.shape, dtype=np.uint8)
+            terrain[(normalized >= 0.3) & (normalized < 0.6)] = 1  # Plains
+            terrain[(normalized >= 0.6) & (normalized < 0.7)] = 2  # Hills
+            terrain[normalized >= 0.7] = 3  # Mountains
+            self.layers[core] = terrain
+        self.layers.flush()
+
+    def generate_forests(self, forest_probability=0.1, min_forest_size=5, max_forest_size=15):
+        """
+        Generate forests tile by tile. Patches are seeded inside each tile but may grow up to
+        `max_forest_size` cells into its neighbours, so they cross tile borders like on a single map.
+        """
+        rng = np.random.default_rng(self.forest_seed)
+        for core, window, inner in self.tiles(halo=max_forest_size):
+            layers = np.array(self.layers[window])
+
+            # Only seed on plains and hills inside the core tile
+            core_terrain = layers[inner] & TERRAIN_MASK
+            possible_positions = np.where((core_terrain == 1) | (core_terrain == 2))
+            possible_positions = (possible_positions[0] + inner[0].start, possible_positions[1] + inner[1].start)
+
+            num_forests = int(len(possible_positions[0]) * forest_probability)
+            grow_forests(layers, possible_positions, num_forests, min_forest_size, max_forest_size, rng=rng)
+            self.layers[window] = layers
+        self.layers.flush()
+
+    def compute_features(self):
+        """
+        Compute the feature fields tile by tile. Distances are capped at `Max_Distance`, so a halo of that
+        width is enough for each tile to see every water or mountain cell that can affect it.
+        """
+        window_size = config.Terrain_Feature_config["Window"]
+        max_distance = config.Terrain_Feature_config["Max_Distance"]
+        halo = max(int(np.ceil(max_distance)), window_size // 2 + 1)
+        for name in self.feature_layers:
+            setattr(self, name, self.open_layer(name, np.float32))
+
+        for core, window, inner in self.tiles(halo=halo):
+            fields = feature_fields(np.asarray(self.layers[window]), np.asarray(self.normalized_map[window]),
+                                    window=window_size, max_distance=max_distance)
+            for name, field in fields.items():
+                getattr(self, name)[core] = field[inner]
+        for name in self.feature_layers:
+            getattr(self, name).flush()
+
 # Example usage
 # if __name__ == "__main__":
 
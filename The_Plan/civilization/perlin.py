@@ -0,0 +1,120 @@
+import numpy as np
+
+# Permutation and gradient tables used by the `noise` package's C implementation of pnoise2.
+_PERMUTATION = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225, 140,
+    36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247, 120,
+    234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57, 177, 33,
+    88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74, 165, 71,
+    134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122, 60, 211, 133,
+    230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54, 65, 25, 63, 161,
+    1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169, 200, 196, 135, 130,
+    116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64, 52, 217, 226, 250,
+    124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212, 207, 206, 59, 227,
+    47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213, 119, 248, 152, 2, 44,
+    154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9, 129, 22, 39, 253, 19, 98,
+    108, 110, 79, 113, 224, 232, 178, 185, 112, 104, 218, 246, 97, 228, 251, 34,
+    242, 193, 238, 210, 144, 12, 191, 179, 162, 241, 81, 51, 145, 235, 249, 14,
+    239, 107, 49, 192, 214, 31, 181, 199, 106, 157, 184, 84, 204, 176, 115, 121,
+    50, 45, 127, 4, 150, 254, 138, 236, 205, 93, 222, 114, 67, 29, 24, 72, 243,
+    141, 128, 195, 78, 66, 215, 61, 156, 180,
+]
+PERMUTATION = np.array(_PERMUTATION, dtype=np.uint8)
+
+# x and y components of the 16 gradients indexed by `hash & 15`.
+GRAD_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, -1, 0, 0], dtype=np.float32)
+GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 0, 0, -1, 1], dtype=np.float32)
+
+# Gradient index of the second-level hash PERM[PERM[k]] for every first-level index k.
+GRADIENT_INDEX = PERMUTATION[PERMUTATION] & 15
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def _lattice(coords, repeat, base):
+    """Per-axis lattice hashes, fractional offsets and fade weights for one octave."""
+    cell = np.floor(np.fmod(coords, repeat)).astype(np.int32)
+    next_cell = np.fmod((cell + 1).astype(np.float32), repeat).astype(np.int32)
+    offset = coords - np.floor(coords)
+    # The permutation table is 256-periodic, so masking to a byte is the same lookup.
+    return ((cell + base) & 255).astype(np.uint8), ((next_cell + base) & 255).astype(np.uint8), offset, _fade(offset)
+
+
+def _corner(row_hash, col_hash, x_offset, y_offset):
+    """
+    Gradient contribution of one lattice corner over the whole grid.
+
+    The gradient at cell (r, c) depends on PERM[row_hash[r]] and col_hash[c]. Rather than gathering
+    every cell, build the 256 possible rows once and copy them out by row, which is close to memcpy speed.
+    """
+    table_index = (np.arange(256, dtype=np.uint8)[:, None] + col_hash[None, :]).astype(np.uint8)
+    gradient = GRADIENT_INDEX[table_index]
+    rows = PERMUTATION[row_hash]
+    return GRAD_X[gradient][rows] * x_offset[:, None] + (GRAD_Y[gradient] * y_offset[None, :])[rows]
+
+
+def noise2_grid(x, y, repeatx, repeaty, base):
+    """Single octave of 2D gradient noise over the grid spanned by row coordinates `x` and column coordinates `y`."""
+    i, ii, x_offset, fx = _lattice(x, repeatx, base)
+    j, jj, y_offset, fy = _lattice(y, repeaty, base)
+
+    n00 = _corner(i, j, x_offset, y_offset)
+    n10 = _corner(ii, j, x_offset - 1, y_offset)
+    n01 = _corner(i, jj, x_offset, y_offset - 1)
+    n11 = _corner(ii, jj, x_offset - 1, y_offset - 1)
+
+    fx = fx[:, None]
+    return _lerp(fy[None, :], _lerp(fx, n00, n10), _lerp(fx, n01, n11))
+
+
+def pnoise2_grid(x, y, octaves=1, persistence=0.5, lacunarity=2.0, repeatx=1024, repeaty=1024, base=0):
+    """
+    Vectorized equivalent of `noise.pnoise2`, evaluating every octave over a whole grid at once.
+
+    The grid is the outer product of the 1D row coordinates `x` and column coordinates `y`, i.e. the
+    result at [r, c] is pnoise2(x[r], y[c], ...). Single-precision arithmetic follows the C implementation,
+    so the result matches `np.vectorize(pnoise2)` exactly. The one deliberate difference is that permutation
+    lookups past the end of the C table wrap around instead of reading out of bounds, which the C code
+    does for large `base` values.
+
+    Parameters:
+    x (array_like): 1D row coordinates.
+    y (array_like): 1D column coordinates.
+    octaves (int): Number of octaves to sum.
+    persistence (float): Amplitude multiplier applied per octave.
+    lacunarity (float): Frequency multiplier applied per octave.
+    repeatx, repeaty (float): Period of the noise along each axis at the base frequency.
+    base (int): Offset into the permutation table, used as the noise seed.
+
+    Returns:
+    np.ndarray: float32 array of shape (len(x), len(y)).
+    """
+    if octaves < 1:
+        raise ValueError("Expected octaves value > 0")
+
+    x = np.asarray(x, dtype=np.float32).ravel()
+    y = np.asarray(y, dtype=np.float32).ravel()
+    base = int(base)
+    persistence = np.float32(persistence)
+    lacunarity = np.float32(lacunarity)
+    repeatx = np.float32(repeatx)
+    repeaty = np.float32(repeaty)
+
+    freq = np.float32(1.0)
+    amp = np.float32(1.0)
+    max_amp = np.float32(0.0)
+    total = np.zeros((len(x), len(y)), dtype=np.float32)
+
+    for _ in range(octaves):
+        total += noise2_grid(x * freq, y * freq, repeatx * freq, repeaty * freq, base) * amp
+        max_amp += amp
+        freq *= lacunarity
+        amp *= persistence
+
+    return total / max_amp
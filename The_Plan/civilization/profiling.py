@@ -0,0 +1,141 @@
+import contextlib
+import cProfile
+import json
+import os
+import threading
+import time
+
+
+class PhaseTimer:
+    """
+    Lightweight wall-time accounting per named phase of a run, optionally broken down per civilization.
+
+    Wrap work in `span("phase")` (or `span("phase", civ=name)`) and tally anything countable with `count`.
+    `report` summarizes everything as a JSON-friendly dict with sorted keys, so reports from different
+    versions can be diffed. Updates are locked, so one timer can be shared across threads.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = time.perf_counter()
+        # phase -> [calls, total seconds, max seconds]
+        self.phases = {}
+        # civilization -> phase -> [calls, total seconds, max seconds]
+        self.civilizations = {}
+        self.counters = {}
+
+    def __getstate__(self):
+        # Objects holding a timer can still be pickled, e.g. for joblib or process pools
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def add(self, name, seconds, civ=None):
+        """Record one completed call of a phase."""
+        with self.lock:
+            tables = [self.phases] if civ is None else [self.phases, self.civilizations.setdefault(civ, {})]
+            for table in tables:
+                stats = table.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    @contextlib.contextmanager
+    def span(self, name, civ=None):
+        """Time the enclosed block as one call of phase `name`."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, civ)
+
+    def count(self, name, amount=1):
+        """Add to a named counter, e.g. events sampled or LLM calls made."""
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    @staticmethod
+    def summarize(table, wall_time):
+        return {
+            name: {
+                "calls": calls,
+                "total_seconds": round(total, 6),
+                "mean_seconds": round(total / calls, 6),
+                "max_seconds": round(longest, 6),
+                "share_of_wall_time": round(total / wall_time, 4) if wall_time else 0.0,
+            }
+            for name, (calls, total, longest) in sorted(table.items())
+        }
+
+    def report(self):
+        """Per-phase, per-civilization and counter totals since the timer was created or reset."""
+        wall_time = time.perf_counter() - self.started
+        with self.lock:
+            return {
+                "wall_time_seconds": round(wall_time, 6),
+                "phases": self.summarize(self.phases, wall_time),
+                "civilizations": {civ: self.summarize(phases, wall_time) for civ, phases in sorted(self.civilizations.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def write_report(self, path):
+        """Write `report` to `path` as indented JSON and return the report."""
+        report = self.report()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        return report
+
+
+# Timer used by code that isn't handed one, e.g. a TerrainMap or ArtifactAnalyzer built outside a World
+default_timer = PhaseTimer()
+
+
+@contextlib.contextmanager
+def profile(path, profiler="cprofile"):
+    """
+    Run the enclosed block under a sampling or tracing profiler and save its output to `path`.
+
+    "cprofile" writes pstats data (view with `python -m pstats` or snakeviz). "pyinstrument" writes an HTML
+    report and needs the optional pyinstrument package.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if profiler == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    elif profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("The pyinstrument profiler needs the pyinstrument package: pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield profiler
+        finally:
+            profiler.stop()
+            with open(path, "w") as file:
+                file.write(profiler.output_html())
+    else:
+        raise ValueError(f"Unknown profiler {profiler!r}, expected 'cprofile' or 'pyinstrument'")
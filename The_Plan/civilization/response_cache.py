@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import config
+
+# Bump whenever the stored response format changes in a way that makes previously cached responses stale.
+CACHE_FORMAT_VERSION = 1
+
+
+class CacheMissError(LookupError):
+    """Raised in cache-only mode when a request has no cached response."""
+
+
+class ResponseCache:
+    """
+    SQLite cache of chat completion responses, keyed by a hash of the backend, model, prompt, max_tokens and
+    temperature.
+
+    Byte-identical requests, e.g. from re-running a seeded simulation, are answered from disk instead of the
+    API. Hits refresh an entry's last use time, and whenever the cache grows past `max_bytes` the least
+    recently used responses are evicted. Each thread and process opens its own connection, so one cache
+    file can be shared by threaded worlds and by a process-pool sweep.
+    """
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or config.LLM_config["Cache_Path"]
+        self.max_bytes = max_bytes if max_bytes is not None else config.LLM_config["Max_Cache_Bytes"]
+        self.local = threading.local()
+
+    def __getstate__(self):
+        # Connections belong to the thread that opened them, so a pickled cache (e.g. sent to a joblib worker
+        # with its World) opens its own
+        state = self.__dict__.copy()
+        del state["local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.local = threading.local()
+
+    @staticmethod
+    def make_key(request, backend="openai"):
+        """Hash a ChatRequest, and the name of the backend answering it, into a cache key."""
+        payload = json.dumps({"version": CACHE_FORMAT_VERSION, "backend": backend, "model": request.model,
+                              "prompt": request.prompt, "max_tokens": request.max_tokens,
+                              "temperature": request.temperature}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def connection(self):
+        """This thread's connection, opened (and the table created) on first use."""
+        if getattr(self.local, "pid", None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, "
+                               "response TEXT, size INTEGER, last_used REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            # Running total of the sizes, kept by triggers so `size` doesn't scan the table. REPLACE only fires
+            # the delete trigger for the row it overwrites with recursive triggers on.
+            connection.execute("PRAGMA recursive_triggers=ON")
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER)")
+            connection.execute("INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM responses")
+            connection.execute("CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses "
+                               "BEGIN UPDATE totals SET size = size + NEW.size; END")
+            connection.execute("CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses "
+                               "BEGIN UPDATE totals SET size = size - OLD.size; END")
+            connection.execute("COMMIT")
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+        return self.local.connection
+
+    def get(self, request, backend="openai"):
+        """Return the cached response content for a ChatRequest, or None on a miss."""
+        key = self.make_key(request, backend)
+        connection = self.connection()
+        row = connection.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, request, response, backend="openai"):
+        """Store the response content of a ChatRequest, then evict old entries if the cache is over budget."""
+        size = len(request.prompt.encode("utf-8")) + len(response.encode("utf-8"))
+        self.connection().execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                                  (self.make_key(request, backend), request.model, response, size, time.time()))
+        self.evict()
+
+    def size(self):
+        """Approximate bytes held, counting prompts and responses."""
+        return self.connection().execute("SELECT size FROM totals").fetchone()[0]
+
+    def evict(self):
+        """Delete least recently used responses until the cache fits in `max_bytes`."""
+        connection = self.connection()
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        keys = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            keys.append((key,))
+            excess -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def clear(self):
+        """Remove every cached response."""
+        self.connection().execute("DELETE FROM responses")
+
+
+default_cache = ResponseCache()
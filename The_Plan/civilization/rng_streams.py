@@ -0,0 +1,64 @@
+import random
+import numpy as np
+
+# Stream kinds, the first element of every stream's spawn key
+WORLD = 0
+CIVILIZATION = 1
+AGE = 2
+SIMULATION = 3
+INTERACTION = 4
+
+
+def as_numpy_rng(rng=None):
+    """
+    Return a NumPy Generator for `rng`: Generators pass through, and a `random.Random` (or the `random`
+    module itself when `rng` is None) seeds a new Generator from its own stream, so it stays reproducible.
+    """
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng((rng or random).getrandbits(64))
+
+
+class RandomStreams:
+    """
+    Seeded hierarchy of independent random streams: root seed -> world, per-civilization and per-age streams.
+
+    Every stream is derived from the root seed with `np.random.SeedSequence` and a spawn key naming it,
+    e.g. (AGE, civ_id, age). Streams depend only on their key, not on the order they are requested in,
+    so a run replays bit-for-bit and work can be split across processes without changing results.
+    """
+    def __init__(self, seed=None):
+        self.root = np.random.SeedSequence(seed)
+        # Record the entropy actually used so an unseeded run can be replayed
+        self.seed = self.root.entropy
+
+    def sequence(self, *key):
+        return np.random.SeedSequence(self.seed, spawn_key=tuple(int(part) for part in key))
+
+    def numpy(self, *key):
+        """NumPy Generator for the stream named by `key`."""
+        return np.random.default_rng(self.sequence(*key))
+
+    def python(self, *key):
+        """`random.Random` for the stream named by `key`."""
+        return random.Random(int(self.sequence(*key).generate_state(1, dtype=np.uint64)[0]))
+
+    def world(self):
+        """Stream for terrain generation."""
+        return self.numpy(WORLD)
+
+    def civilization(self, civ_id):
+        """Stream for founding a civilization: its name, placement and starting traits."""
+        return self.python(CIVILIZATION, civ_id)
+
+    def age(self, civ_id, age):
+        """Stream for everything a civilization does during one age."""
+        return self.python(AGE, civ_id, age)
+
+    def simulation(self):
+        """Stream for simulation-wide draws that don't belong to a single civilization."""
+        return self.python(SIMULATION)
+
+    def interactions(self, age):
+        """Stream for scheduling and resolving neighbor interactions during one age."""
+        return self.python(INTERACTION, age)
@@ -1,21 +1,50 @@
 # import pygame
-from civilization import Civilization
-from charts import ArtifactCharts
-import analysis
+import contextlib
+from civilization import Civilization, World
+import checkpoint
+import config
+import profiling
 from map_generation import TerrainMap
 import random
 
 class CulturaSimulation:
-    def __init__(self, civs=2, dev_mode=False, ages=2, width=25, height=25,speed_multiplier=1):
+    def __init__(self, civs=2, dev_mode=False, ages=2, width=25, height=25,speed_multiplier=1, seed=None,
+                 resume_from=None, checkpoint_every=None, checkpoint_path=None, artifact_file="artifact.jsonl",
+                 report_path=None, profiler=None, profiler_path=None):
+        """
+        Set up a new World, or with `resume_from` restore one from a checkpoint file; `ages` is then the
+        run's total and only the ages left are simulated. Each simulation owns its World, so several can
+        run side by side.
+
+        The World's phase timings are written as JSON to `report_path` when the run finishes, and with
+        `profiler` ("cprofile" or "pyinstrument") the whole run is also profiled into `profiler_path`.
+        """
         self.civs = civs
         self.dev_mode = dev_mode
         self.ages = ages
         self.width = width
         self.height = height
-        self.civiliation_class = Civilization
-        self.civiliation_class.speed_multiplier = speed_multiplier
-        self.civilizations = []
-        self.terrain_map = self.civiliation_class.map.get_terrain_map()
+        self.checkpoint_every = config.Checkpoint_config["Every_Ages"] if checkpoint_every is None else checkpoint_every
+        self.profiler = profiler or config.Profiling_config["Profiler"]
+        self.resumed = resume_from is not None
+        if self.resumed:
+            self.world = checkpoint.load_checkpoint(resume_from)
+            checkpoint.discard_artifacts_after(self.world.artifact_file, self.world.artifact_offset, self.world.seed)
+            self.completed_ages = self.world.current_age
+            self.width = self.world.width
+            self.height = self.world.height
+            print(f"Resumed from {resume_from} after {self.completed_ages} ages, seed: {self.world.seed}")
+        else:
+            self.world = World(width=width, height=height, seed=seed, artifact_file=artifact_file)
+            self.world.speed_multiplier = speed_multiplier
+            self.completed_ages = 0
+            # Pass the printed seed back in to replay this run
+            print(f"Simulation seed: {self.world.seed}")
+        self.seed = self.world.seed
+        self.checkpoint_path = checkpoint_path or config.Checkpoint_config["Path"].format(seed=self.seed)
+        self.report_path = report_path or config.Profiling_config["Report_Path"].format(seed=self.seed)
+        self.profiler_path = profiler_path or config.Profiling_config["Profiler_Path"].format(seed=self.seed)
+        self.terrain_map = self.world.map.get_terrain_map()
         # self.terrain_map = TerrainMap(width=width, height=height, base_scale=40.0, octaves=6)
 
         # Set up Pygame window
@@ -29,30 +58,37 @@ class CulturaSimulation:
         print("************ Welcome To The Civilization Simulation: Cultura ************\n")
         print("*************************************************************************\n")
 
-    def analyze_artifacts(self):
-        """Analyze the generated artifacts and return the average cumulative score."""
+    def analyze_artifacts(self, worlds=None, analyzed_file="analyzed_artifacts.jsonl"):
+        """Analyze the generated artifacts of the given Worlds (this simulation's by default) and return the average cumulative score."""
+        # Imported here so running a simulation doesn't load the embedding model and NLTK data
+        import analysis
+
         print("Analyzing artifacts...")
-        analyzer = analysis.ArtifactAnalyzer(Civilization_Class=Civilization)
+        analyzer = analysis.ArtifactAnalyzer(artifact_file=self.world.artifact_file, analyzed_file=analyzed_file,
+                                             worlds=worlds or [self.world], timer=self.world.timer)
         average_score = analyzer.analyze_artifacts()
         print("Average cumulative score of all civilizations' generated artifacts:", average_score)
         return average_score
 
     def create_charts(self):
         """Generate and save all charts based on the artifacts."""
+        from charts import ArtifactCharts
+
         charts = ArtifactCharts()
         charts.generate_all_charts()
 
     def generate_civilizations(self):
         """Generate a specified number of civilizations."""
         for i in range(self.civs):
-            Civilization()
-            # self.civilizations.append(civ)
-            print(f"Generated civilization #{i + 1}: {Civilization.Civilizations[i].name} at {Civilization.Civilizations[i].location}")
+            civ = Civilization(self.world)
+            print(f"Generated civilization #{i + 1}: {civ.name} at {civ.location}")
 
     def progress_simulation(self):
         """Run the simulation for a specified number of ages."""
         print("Progressing civilizations...")
-        Civilization.progress_and_interact_all_civilizations(ages=self.ages)
+        self.world.progress_and_interact_all_civilizations(ages=max(0, self.ages - self.completed_ages),
+                                                           checkpoint_every=self.checkpoint_every,
+                                                           checkpoint_path=self.checkpoint_path)
 
     # def visualize_terrain(self):
     #     """Visualize the terrain map."""
@@ -99,19 +135,32 @@ class CulturaSimulation:
 
     #     pygame.quit()
 
+    def write_report(self):
+        """Write the World's phase timings to `report_path` and print where they went."""
+        if self.world.timer.enabled and self.report_path:
+            report = self.world.timer.write_report(self.report_path)
+            print(f"Profiling report written to {self.report_path} ({report['wall_time_seconds']:.1f}s)")
+
     def start_simulation(self):
         """Run the full simulation and include visualization."""
+        profiler = profiling.profile(self.profiler_path, self.profiler) if self.profiler else contextlib.nullcontext()
+        with profiler:
+            self.run_simulation()
+        self.write_report()
+
+    def run_simulation(self):
         self.print_intro()
 
         # Set development mode parameters
         if self.dev_mode:
-            Civilization.default_R = int(min(Civilization.map.width, Civilization.map.height) * 1)
-            print("Using development mode with R for all civs being:", Civilization.default_R)
+            self.world.default_r = int(min(self.world.map.width, self.world.map.height) * 1)
+            print("Using development mode with R for all civs being:", self.world.default_r)
 
-        # Generate civilizations
-        self.generate_civilizations()
+        # Generate civilizations, unless they were restored from a checkpoint
+        if not self.resumed:
+            self.generate_civilizations()
         
-        print (Civilization.Civilizations[-1].cultural_context)
+        print (self.world.civilizations[-1].cultural_context)
 
         # Run the simulation
         self.progress_simulation()
@@ -121,11 +170,12 @@ class CulturaSimulation:
         #            self.run_visualization()         #
         # ******************************************* #
 
-    def end_simulation(self):
+    def end_simulation(self, worlds=None):
         """End the simulation and analyze and create charts."""
         # Analyze and create charts
-        self.analyze_artifacts()
+        self.analyze_artifacts(worlds)
         self.create_charts()
+        self.write_report()
 
 if __name__ == "__main__":
     simulations = 5
@@ -134,13 +184,15 @@ if __name__ == "__main__":
     increasing = False
     speed_multiplier = 8
 
+    worlds = []
     for simulation in range(simulations):
         print(f"\nStarting simulation #{simulation + 1} with {civs} civilizations and {ages} ages...\n")
         simulation = CulturaSimulation(civs=civs, dev_mode=True, ages=ages,speed_multiplier=speed_multiplier)
         simulation.start_simulation()
+        worlds.append(simulation.world)
 
         # print("\n\n\n")
-        # for civ in Civilization.Civilizations:
+        # for civ in simulation.world.civilizations:
         #     print(f"{civ.cultural_context}\n")
         #     print(f"History: \n    {civ.string_history}\n")
         #     print(f"Neighbor History: \n    {civ.string_neighbor_history}\n")
@@ -148,4 +200,5 @@ if __name__ == "__main__":
         if increasing:
             civs += 1
             ages = ages ** 2
-    simulation.end_simulation()
+    # Every run appends to the same artifact file, so analyze them together
+    simulation.end_simulation(worlds)
@@ -0,0 +1,44 @@
+import math
+from collections import defaultdict
+import misc
+
+
+class GridSpatialIndex:
+    """
+    Uniform grid of buckets for radius queries over items placed on the map.
+
+    Items are bucketed by `location // cell_size`, so a query only looks at the buckets overlapping the
+    query circle instead of every item. Inserts and removals are O(1), which lets the index be updated
+    incrementally as civilizations are founded.
+    """
+    def __init__(self, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self.buckets = defaultdict(list)
+
+    def bucket_for(self, location):
+        return (location[0] // self.cell_size, location[1] // self.cell_size)
+
+    def insert(self, item, location):
+        self.buckets[self.bucket_for(location)].append((item, location))
+
+    def remove(self, item, location):
+        bucket = self.buckets[self.bucket_for(location)]
+        bucket[:] = [(other, other_location) for other, other_location in bucket if other is not item]
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.buckets.values())
+
+    def query_radius(self, location, radius):
+        """Return the items within Euclidean `radius` of `location`, in insertion order per bucket."""
+        span = math.ceil(radius / self.cell_size)
+        bucket_x, bucket_y = self.bucket_for(location)
+        found = []
+        for dx in range(-span, span + 1):
+            for dy in range(-span, span + 1):
+                bucket = self.buckets.get((bucket_x + dx, bucket_y + dy))
+                if not bucket:
+                    continue
+                for item, item_location in bucket:
+                    if misc.calculate_distance(location, item_location) <= radius:
+                        found.append(item)
+        return found
@@ -0,0 +1,132 @@
+import contextlib
+import csv
+import itertools
+import os
+import random
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Columns of the results table, followed by one column per swept parameter
+result_columns = ["index", "status", "wall_time", "civilizations", "final_year", "artifacts", "average_score",
+                  "run_dir", "error"]
+
+
+def sweep_grid(civs=(3,), ages=(8,), speed_multiplier=(1,), seeds=(None,), **fixed):
+    """
+    Every combination of the given civilization counts, ages, speed multipliers and seeds, as
+    CulturaSimulation keyword dicts. `fixed` keyword arguments are added to every run.
+    """
+    return [
+        {"civs": civ_count, "ages": age_count, "speed_multiplier": speed, "seed": seed, **fixed}
+        for civ_count, age_count, speed, seed in itertools.product(civs, ages, speed_multiplier, seeds)
+    ]
+
+
+def normalize_param_sets(param_sets):
+    """Copy each run's keyword dict and give it a concrete seed, so every run can be replayed."""
+    normalized = []
+    for params in param_sets:
+        params = dict(params)
+        if params.get("seed") is None:
+            params["seed"] = random.getrandbits(64)
+        normalized.append(params)
+    return normalized
+
+
+def run_simulation(index, params, output_dir, analyze=False):
+    """
+    Worker: run one CulturaSimulation in its own shard directory and return a results row.
+
+    The shard holds the run's artifacts, checkpoints, analyzed artifacts, its `profile.json` timing report
+    and its captured console output in `log.txt`. Failures are caught and reported in the row, with the traceback in the log.
+    """
+    start = time.perf_counter()
+    run_dir = os.path.join(output_dir, f"run_{index:05d}")
+    os.makedirs(run_dir, exist_ok=True)
+    result = {"index": index, "params": params, "status": "ok", "error": None, "run_dir": run_dir,
+              "civilizations": None, "final_year": None, "artifacts": None, "average_score": None}
+
+    with open(os.path.join(run_dir, "log.txt"), "w") as log, contextlib.redirect_stdout(log):
+        try:
+            from simulation import CulturaSimulation
+
+            simulation = CulturaSimulation(artifact_file=os.path.join(run_dir, "artifact.jsonl"),
+                                           checkpoint_path=os.path.join(run_dir, "checkpoint.npz"),
+                                           report_path=os.path.join(run_dir, "profile.json"), **params)
+            simulation.start_simulation()
+            world = simulation.world
+            result.update(civilizations=len(world.civilizations), final_year=world.current_year,
+                          artifacts=len(world.existing_artifacts))
+            if analyze:
+                result["average_score"] = float(simulation.analyze_artifacts(
+                    analyzed_file=os.path.join(run_dir, "analyzed_artifacts.jsonl")))
+                simulation.write_report()
+        except Exception as e:
+            traceback.print_exc(file=log)
+            result["status"] = "failed"
+            result["error"] = f"{type(e).__name__}: {e}"
+
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+def write_results(results, path):
+    """Write results rows to a CSV table, one column per swept parameter after the fixed columns."""
+    param_names = []
+    for result in results:
+        param_names.extend(name for name in result["params"] if name not in param_names)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(result_columns + param_names)
+        for result in results:
+            writer.writerow([result[column] for column in result_columns] +
+                            [result["params"].get(name) for name in param_names])
+
+
+def run_sweep(param_sets, output_dir="sweeps", max_workers=None, analyze=False):
+    """
+    Run many independent CulturaSimulations across a process pool.
+
+    Parameters:
+    param_sets (list): CulturaSimulation keyword dicts, one per run, e.g. from `sweep_grid`.
+    output_dir (str): Directory each run gets its own `run_<index>` shard in.
+    max_workers (int, optional): Number of worker processes, defaults to the CPU count.
+    analyze (bool): Also analyze each run's artifacts inside its worker.
+
+    Returns:
+    list: One results row per run, in input order, also written to `results.csv` in `output_dir`.
+    """
+    param_sets = normalize_param_sets(param_sets)
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = []
+
+    def report(result):
+        results.append(result)
+        print(f"[{len(results)}/{len(param_sets)}] run {result['index']} {result['status']} in {result['wall_time']:.1f}s"
+              + (f": {result['error']}" if result["error"] else ""))
+
+    if max_workers == 1:
+        for index, params in enumerate(param_sets):
+            report(run_simulation(index, params, output_dir, analyze))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_simulation, index, params, output_dir, analyze)
+                       for index, params in enumerate(param_sets)]
+            for future in as_completed(futures):
+                report(future.result())
+
+    results.sort(key=lambda result: result["index"])
+    write_results(results, os.path.join(output_dir, "results.csv"))
+
+    elapsed = time.perf_counter() - start
+    failed = sum(result["status"] != "ok" for result in results)
+    busy = sum(result["wall_time"] for result in results)
+    print(f"Sweep finished: {len(results) - failed} ok, {failed} failed in {elapsed:.1f}s "
+          f"({busy / elapsed if elapsed else 0:.1f}x parallel speedup)")
+    return results
+
+
+if __name__ == "__main__":
+    run_sweep(sweep_grid(civs=(3, 4, 5), ages=(4, 8), speed_multiplier=(1, 8), dev_mode=True))
@@ -0,0 +1,31 @@
+import functools
+import re
+
+# Rough stand-in for a BPE tokenizer: words, numbers and punctuation marks each count as a token
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@functools.lru_cache(maxsize=None)
+def encoding_for(model):
+    """The tiktoken encoding of `model`, or None if tiktoken isn't installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """
+    Count the tokens `text` takes up in a prompt, locally and without an API call.
+
+    Uses the model's tiktoken encoding when the optional tiktoken package is installed, and otherwise
+    counts words and punctuation, a slight undercount for English prose that is close enough for budgeting.
+    """
+    encoding = encoding_for(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(TOKEN_PATTERN.findall(text))
@@ -0,0 +1,139 @@
+import threading
+import config
+
+
+def trait_vocabulary():
+    """Every trait a civilization can be founded with or gain by progressing, in a stable order."""
+    names = []
+    for traits in list(config.base_traits.values()) + [["Undefined"], config.founding_traits, config.progression_traits]:
+        for trait in traits:
+            if trait not in names:
+                names.append(trait)
+    return names
+
+
+class TraitRegistry:
+    """Interns trait names into small integer ids shared by every civilization."""
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        # Worlds simulated in parallel threads share the registry
+        self.lock = threading.Lock()
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        """Return the id of `name`, registering it if it is new."""
+        trait_id = self.ids.get(name)
+        if trait_id is None:
+            with self.lock:
+                trait_id = self.ids.get(name)
+                if trait_id is None:
+                    self.names.append(name)
+                    trait_id = self.ids[name] = len(self.names) - 1
+        return trait_id
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+
+registry = TraitRegistry(trait_vocabulary())
+
+
+def popcount(bits):
+    return bin(bits).count("1")
+
+
+class TraitSet:
+    """
+    A civilization's traits as a bitset over `registry` ids, with how many times each trait was acquired.
+
+    Bit `i` is set when the civilization holds the trait with id `i`, so membership, adding and removing
+    are O(1) and the set never grows past the number of distinct traits however often they are exchanged.
+    Iterating yields trait names in id order.
+    """
+    __slots__ = ("bits", "counts")
+
+    def __init__(self, names=()):
+        self.bits = 0
+        self.counts = {}
+        for name in names:
+            self.add(name)
+
+    @classmethod
+    def from_ids(cls, trait_ids):
+        traits = cls()
+        for trait_id in trait_ids:
+            traits.bits |= 1 << int(trait_id)
+            traits.counts[int(trait_id)] = traits.counts.get(int(trait_id), 0) + 1
+        return traits
+
+    def add(self, name):
+        """Add a trait, counting repeated acquisitions. Returns True if the trait is new to the set."""
+        trait_id = registry.intern(name)
+        self.counts[trait_id] = self.counts.get(trait_id, 0) + 1
+        bit = 1 << trait_id
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+        return True
+
+    def discard(self, name):
+        """Remove a trait entirely, whatever its count."""
+        trait_id = registry.ids.get(name)
+        if trait_id is not None:
+            self.bits &= ~(1 << trait_id)
+            self.counts.pop(trait_id, None)
+
+    def count(self, name):
+        """How many times the trait was acquired, 0 if not held."""
+        return self.counts.get(registry.ids.get(name), 0)
+
+    def ids(self):
+        """Ids of the held traits in increasing order."""
+        trait_ids = []
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            trait_ids.append(low.bit_length() - 1)
+            bits ^= low
+        return trait_ids
+
+    def names(self):
+        return [registry.names[trait_id] for trait_id in self.ids()]
+
+    def choice(self, rng):
+        """Pick one held trait uniformly at random."""
+        return rng.choice(self.names())
+
+    def similarity(self, other):
+        """Jaccard similarity of two trait sets, 1.0 for two empty sets."""
+        union = self.bits | other.bits
+        return popcount(self.bits & other.bits) / popcount(union) if union else 1.0
+
+    def copy(self):
+        traits = TraitSet()
+        traits.bits = self.bits
+        traits.counts = dict(self.counts)
+        return traits
+
+    def __contains__(self, name):
+        trait_id = registry.ids.get(name)
+        return trait_id is not None and bool(self.bits >> trait_id & 1)
+
+    def __iter__(self):
+        return iter(self.names())
+
+    def __len__(self):
+        return popcount(self.bits)
+
+    def __eq__(self, other):
+        if isinstance(other, TraitSet):
+            return self.bits == other.bits
+        return NotImplemented
+
+    def __repr__(self):
+        return f"TraitSet({self.names()!r})"
@@ -0,0 +1,335 @@
+import artifact_batching
+import config
+import event_log
+import event_picker
+import interaction_scheduler
+import llm_client
+import map_generation
+import misc
+import profiling
+import response_cache
+import rng_streams
+import spatial_index
+import trait_registry
+
+
+class World:
+    """
+    Everything one simulation run owns: the map, its civilizations, the clock, random streams, the shared
+    event log, the interaction scheduler, the LLM client and where generated artifacts are written.
+
+    Civilizations hold a reference to their World rather than sharing class-level state, so several
+    simulations can run side by side in one process, in threads, or in separate processes.
+    """
+    max_tech_level = len(config.Tech_eras)
+
+    def __init__(self, width=25, height=25, seed=None, artifact_file="artifact.jsonl", timer=None, **map_kwargs):
+        """
+        Parameters:
+        width, height (int): Map size. The map is generated the first time `map` is read.
+        seed (int, optional): Root seed of the world's random streams, fresh entropy if not provided.
+        artifact_file (str): JSONL file generated artifacts are appended to.
+        timer (PhaseTimer, optional): Collects the run's phase timings, a new one if not provided.
+        map_kwargs: Extra TerrainMap arguments.
+        """
+        self.width = width
+        self.height = height
+        self.map_kwargs = map_kwargs
+        self._map = None
+        self.timer = timer or profiling.PhaseTimer(enabled=config.Profiling_config["Enabled"])
+        # Seeded random streams; `seed` replays the run
+        self.streams = rng_streams.RandomStreams(seed)
+        self.default_r = int(min(width, height) * 1)
+        self.spatial_index = spatial_index.GridSpatialIndex(cell_size=self.default_r)
+
+        self.civilizations = []
+        self.civilizations_by_name = {}
+        self.log = event_log.EventLog()
+        self.scheduler = interaction_scheduler.InteractionScheduler(
+            pair_budget=config.Interaction_config["Pair_Budget"],
+            weighting=config.Interaction_config["Weighting"],
+            distance_scale=config.Interaction_config["Distance_Scale"],
+            max_attempts=config.Interaction_config["Max_Attempts"],
+            exchange_threshold=config.Interaction_config["Exchange_Threshold"],
+        )
+
+        self.llm = llm_client.LLMClient(backend=llm_client.make_backend(),
+                                        max_concurrency=config.LLM_config["Max_Concurrency"],
+                                        cache=response_cache.default_cache if config.LLM_config["Cache_Enabled"] else None,
+                                        cache_only=config.LLM_config["Cache_Only"], timer=self.timer)
+
+        self.event_limit = config.Cvilization_Class_config["Event_Limit"]
+        self.neighbor_interaction_limit = config.Cvilization_Class_config["Neighbor_Interaction_Limit"]
+        self.current_year = config.Cvilization_Class_config["Starting_Year"]
+        self.year_progression = config.Cvilization_Class_config["Year_Progression"]
+        self.speed_multiplier = config.Cvilization_Class_config["Speed_Multiplier"]
+        self.current_age = 0
+
+        self.artifact_file = artifact_file
+        self.existing_artifacts = []
+
+    @property
+    def seed(self):
+        return self.streams.seed
+
+    @property
+    def map(self):
+        """The world's TerrainMap, generated on first access."""
+        if self._map is None:
+            self._map = map_generation.TerrainMap(width=self.width, height=self.height, rng=self.streams.world(),
+                                                  timer=self.timer, **self.map_kwargs)
+        return self._map
+
+    @map.setter
+    def map(self, terrain):
+        self._map = terrain
+        self.width = terrain.width
+        self.height = terrain.height
+
+    def founding_rng(self, civ_id):
+        """Random stream a civilization is founded with."""
+        return self.streams.civilization(civ_id)
+
+    def age_rng(self, civ_id, age):
+        """Random stream a civilization uses during one age."""
+        return self.streams.age(civ_id, age)
+
+    def interaction_rng(self, age):
+        """Random stream neighbor interactions are scheduled and resolved with during one age."""
+        return self.streams.interactions(age)
+
+    def civ_at(self, x, y):
+        """Return the civilization occupying (x, y), or None."""
+        civ_id = self.map.occupancy.owner(x, y)
+        return None if civ_id is None else self.civilizations[civ_id]
+
+    def get_string_year(self):
+        """Return the current year in human-readable format."""
+        return f"{abs(self.current_year)} {'BC' if self.current_year < 0 else 'AD'}"
+
+    def calculate_year_progression(self, speed_multiplier = 1):
+        """Calculate year progression based on the average tech level."""
+        if not self.civilizations:
+            return(config.Cvilization_Class_config["Year_Progression"])
+        avg_tech_level = sum(civ.tech_level for civ in self.civilizations) / len(self.civilizations)
+        return max(1, int(50 / (avg_tech_level / self.max_tech_level + 0.5))) * speed_multiplier
+
+    def get_unused_civ_name(self, rng):
+        """
+        Selects a random unused civilization name from config.civ_names.
+        Ensures the name has not been used by another civilization.
+        """
+        # Keep config order so a seeded rng picks the same name regardless of string hashing
+        unused_names = [name for name in config.civ_names if name not in self.civilizations_by_name]
+        if unused_names:
+            return rng.choice(unused_names)
+        else:
+            raise ValueError("No unused civilization names available.")
+
+    def place_civilization(self, civ, x=None, y=None, terrain_classes=None):
+        """
+        Places a civilization on the map at the given coordinates (x, y).
+        If no coordinates are provided, or the spot is already occupied by another civilization,
+        it will place the civilization at a random unoccupied spot, optionally of the given terrain classes.
+        """
+        occupancy = self.map.occupancy
+        if x is not None and y is not None and not occupancy.is_free(x, y):
+            print(f"Unable to place {civ.name} at ({x}, {y}), spot is already occupied.")
+            x = y = None
+
+        if x is None or y is None:
+            location = self.get_random_unoccupied_location(terrain_classes, rng=civ.rng)
+            if location is None:
+                print(f"Could not find a valid location for {civ.name}.")
+                return None
+            x, y = location
+
+        occupancy.occupy(x, y, civ.id)
+        civ.location = (x, y)
+        print(f"{civ.name} has been placed at ({x}, {y})")
+
+        return (x, y)
+
+    def get_random_unoccupied_location(self, terrain_classes=None, candidates=None, rng=None):
+        """
+        Finds and returns a random unoccupied location on the map, optionally of the given terrain classes.
+        Draws `candidates` free locations and keeps the one with the best placement score.
+        """
+        if candidates is None:
+            candidates = config.Terrain_Feature_config["Placement_Candidates"]
+
+        terrain = self.map
+        locations = [terrain.occupancy.random_free_cell(terrain_classes, rng) for _ in range(max(1, candidates))]
+        locations = [location for location in locations if location is not None]
+        if not locations:
+            print("No unoccupied location left on the map.")
+            return None
+        return max(locations, key=lambda location: terrain.placement_score(*location))
+
+    def add_civilization(self, civ):
+        """Register a newly founded civilization and link it with the civilizations around it."""
+        self.civilizations.append(civ)
+        self.civilizations_by_name[civ.name] = civ
+        self.spatial_index.insert(civ, civ.location)
+        civ.find_neighbors()
+        for neighbor in civ.neighbors:
+            neighbor.neighbors.append(civ)
+
+    def save_artifact(self, artifact):
+        misc.save_generated_artifact(artifact, filename=self.artifact_file)
+
+    def interact_all_civilizations(self, neighbor_interaction_limit=None, rng=None):
+        """
+        Let the neighbor pairs picked by `scheduler` interact, each pair once, with the results applied to
+        both sides. Repeated positive interactions between a pair exchange a trait each way.
+        """
+        if neighbor_interaction_limit is None:
+            neighbor_interaction_limit = self.neighbor_interaction_limit
+        rng = rng or self.interaction_rng(self.current_age)
+        scheduler = self.scheduler
+
+        start_indices = [len(civ.neighbor_history) for civ in self.civilizations]
+        with self.timer.span("interactions.schedule"):
+            pairs = scheduler.sample_pairs(self.civilizations, rng)
+        # Spread the age's interaction events over the pairs, at least one each
+        events_per_pair = max(1, neighbor_interaction_limit // len(pairs)) if pairs else 0
+
+        with self.timer.span("interactions.resolve"):
+            type_ids, outcome_ids, event_ids = event_picker.event_table.sample(
+                len(pairs) * events_per_pair, event_type_key="Inter-Civilization Interaction", rng=rng)
+            for event_index, (type_id, outcome_id, event_id) in enumerate(zip(type_ids, outcome_ids, event_ids)):
+                civ, neighbor = pairs[event_index // events_per_pair]
+                # Record the interaction once, filed under both civilizations' neighbor history
+                civ.record(event_log.INTERACTION, channel=event_log.NEIGHBOR, code=event_id, outcome=outcome_id,
+                           counterpart=neighbor.id, detail=type_id)
+
+                if scheduler.interact(civ, neighbor, positive=outcome_id == 0):
+                    # Cross-cultural exchange
+                    civ_trait = civ.traits.choice(rng)
+                    neighbor_trait = neighbor.traits.choice(rng)
+                    civ.traits.add(neighbor_trait)
+                    neighbor.traits.add(civ_trait)
+                    civ.record(event_log.EXCHANGE, channel=event_log.NEIGHBOR, code=trait_registry.registry.ids[neighbor_trait],
+                               counterpart=neighbor.id, detail=trait_registry.registry.ids[civ_trait])
+                    self.timer.count("exchanges")
+        self.timer.count("interaction_pairs", len(pairs))
+        self.timer.count("interaction_events", len(event_ids))
+
+        summarized = [civ for civ in self.civilizations if civ.neighbors]
+        requests = [civ.post_progression(history_type = "neighbor_history",start_index = start_index, end_index = len(civ.neighbor_history),
+                                         summarize=False)
+                    for civ, start_index in zip(self.civilizations, start_indices) if civ.neighbors]
+        self.summarize_all(summarized, requests, "neighbor_history")
+
+    def summarize_all(self, civilizations, requests, generation_type="history"):
+        """Send the civilizations' summary requests concurrently and apply the summaries in civilization order."""
+        with self.timer.span("llm.summaries"):
+            responses = self.llm.complete_all(requests)
+        self.timer.count("llm_calls.summaries", len(requests))
+        for civ, response in zip(civilizations, responses):
+            print(civ.apply_summary(response, generation_type))
+
+    def compact_histories(self, civilizations, generation_type="history", rounds=3):
+        """
+        Fold the older summaries of every civilization whose history has outgrown its token budget into era
+        summaries (see HistoryDigest), sending all the fold requests of a round concurrently.
+        """
+        for _ in range(rounds):
+            digests = [civ.digest(generation_type) for civ in civilizations]
+            requests = [digest.fold_request() for digest in digests]
+            folding = [(digest, request) for digest, request in zip(digests, requests) if request is not None]
+            if not folding:
+                return
+            with self.timer.span("llm.history_folds"):
+                responses = self.llm.complete_all([request for _, request in folding])
+            self.timer.count("llm_calls.history_folds", len(folding))
+            for (digest, _), response in zip(folding, responses):
+                digest.apply_fold(response)
+
+    def generate_all_artifacts(self, civilizations, generation_type="history"):
+        """
+        Generate an artifact for each civilization, sending the requests concurrently (several civilizations
+        per request if batching is on), then store and save them in civilization order so a seeded run
+        doesn't depend on which response arrives first.
+        """
+        self.compact_histories(civilizations, generation_type)
+        # Contexts are built in order, since each draws from its civilization's random stream
+        contexts = [civ.artifact_context(generation_type) for civ in civilizations]
+        with self.timer.span(f"llm.artifacts.{generation_type}"):
+            if config.LLM_config["Artifact_Batch_Size"] > 1:
+                responses = self.generate_artifact_batches(civilizations, contexts)
+            else:
+                responses = self.llm.complete_all([civ.artifact_request(context=context)
+                                                   for civ, context in zip(civilizations, contexts)])
+                self.timer.count("llm_calls.artifacts", len(civilizations))
+
+        artifacts = []
+        for civ, response in zip(civilizations, responses):
+            artifact = civ.apply_artifact(response, generation_type)
+            if generation_type == "history":
+                print(f"Generated Artifact (JSON): {artifact}")
+            with self.timer.span("artifacts.save"):
+                self.save_artifact(artifact)
+            artifacts.append(artifact)
+        return artifacts
+
+    def generate_artifact_batches(self, civilizations, contexts):
+        """
+        Ask for several civilizations' artifacts per request, packed under LLM_config's Artifact_Batch_Size
+        and Batch_Token_Budget, then split the answers per civilization. Artifacts missing from or malformed
+        in a batch answer are requested again one civilization at a time.
+        """
+        batches = artifact_batching.plan_batches(contexts, config.LLM_config["Artifact_Batch_Size"],
+                                                 config.LLM_config["Batch_Token_Budget"])
+        answers = self.llm.complete_all([artifact_batching.batch_request([contexts[index] for index in batch])
+                                         for batch in batches])
+        self.timer.count("llm_calls.artifact_batches", len(batches))
+
+        responses = [None] * len(civilizations)
+        for batch, answer in zip(batches, answers):
+            for index, artifact in zip(batch, artifact_batching.split_batch_response(answer, len(batch))):
+                responses[index] = artifact
+
+        retries = [index for index, response in enumerate(responses) if response is None]
+        retried = self.llm.complete_all([civilizations[index].artifact_request(context=contexts[index])
+                                         for index in retries])
+        self.timer.count("llm_calls.artifacts", len(retries))
+        for index, response in zip(retries, retried):
+            responses[index] = response
+        return responses
+
+    def progress_and_interact_all_civilizations(self, ages=5, checkpoint_every=None, checkpoint_path=None):
+        """
+        Run the simulation for all civilizations for a number of ages, writing a checkpoint every
+        `checkpoint_every` ages (see checkpoint.save_checkpoint) if it is set. Checkpoints go to
+        `checkpoint_path`, by default a file named after this World's seed.
+        """
+        import checkpoint
+
+        timer = self.timer
+        for age in range(ages):
+            with timer.span("age"):
+                for civilization in self.civilizations:
+                    civilization.start_age(self.current_age)
+
+                # Every civilization's summary, then every artifact, goes out as one concurrent batch
+                requests = []
+                for civilization in self.civilizations:
+                    with timer.span("progress_history", civ=civilization.name):
+                        requests.append(civilization.progress_history(summarize=False))
+                self.summarize_all(self.civilizations, requests)
+                self.generate_all_artifacts(self.civilizations)
+
+                with timer.span("interactions"):
+                    self.interact_all_civilizations()
+
+                self.generate_all_artifacts([civilization for civilization in self.civilizations if civilization.neighbors],
+                                            generation_type="neighbor")
+
+                self.current_year += self.year_progression
+                self.year_progression = self.calculate_year_progression(self.speed_multiplier)
+                self.current_age += 1
+
+                if checkpoint_every and self.current_age % checkpoint_every == 0:
+                    with timer.span("checkpoint"):
+                        checkpoint.save_checkpoint(checkpoint_path or config.Checkpoint_config["Path"].format(seed=self.seed), self)
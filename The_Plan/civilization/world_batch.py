@@ -0,0 +1,83 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from map_generation import TerrainMap, TERRAIN_MASK, FOREST_FLAG
+from rng_streams import RandomStreams
+
+terrain_names = {0: "Water", 1: "Plains", 2: "Hills", 3: "Mountains"}
+saved_layers = TerrainMap.cached_layers
+
+
+def normalize_param_sets(param_sets):
+    """Turn a list of seeds and/or TerrainMap keyword dicts into keyword dicts with a concrete seed."""
+    normalized = []
+    for params in param_sets:
+        params = {"seed": params} if not isinstance(params, dict) else dict(params)
+        if params.get("seed") is None:
+            params["seed"] = random.randint(1, 250)
+        normalized.append(params)
+    return normalized
+
+
+def terrain_statistics(layers):
+    """Biome fractions and forest coverage of a generated map's terrain layer."""
+    layers = np.asarray(layers).ravel()
+    counts = np.bincount(layers & TERRAIN_MASK, minlength=len(terrain_names))
+    total = counts.sum()
+    return {
+        "biome_fractions": {name: float(counts[terrain] / total) for terrain, name in terrain_names.items()},
+        "forest_coverage": float(np.count_nonzero(layers & FOREST_FLAG) / total),
+    }
+
+
+def build_world(index, params, output_dir):
+    """Worker: generate one map, write its layers as .npy files and return their paths with summary statistics."""
+    start = time.perf_counter()
+    # Seed forest growth from the map seed, otherwise forked workers would all share the parent's random state
+    terrain = TerrainMap(cache=False, rng=RandomStreams(params["seed"]).world(), **params)
+
+    world_dir = os.path.join(output_dir, f"world_{index:05d}_seed_{params['seed']}")
+    os.makedirs(world_dir, exist_ok=True)
+    paths = {}
+    for name in saved_layers:
+        paths[name] = os.path.join(world_dir, f"{name}.npy")
+        np.save(paths[name], getattr(terrain, name))
+
+    return {
+        "index": index,
+        "params": params,
+        "paths": paths,
+        "stats": terrain_statistics(terrain.layers),
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def generate_worlds(param_sets, output_dir="worlds", max_workers=None):
+    """
+    Generate many TerrainMaps across a process pool.
+
+    Parameters:
+    param_sets (list): Seeds (int) and/or dicts of TerrainMap keyword arguments, one per world.
+    output_dir (str): Directory the workers write each world's layers to as .npy files.
+    max_workers (int, optional): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    list: One dict per world, in input order, with its params, layer file paths, terrain statistics and wall time.
+    Layers are passed back as files rather than pickled arrays; use `load_layer` to memory-map them.
+    """
+    param_sets = normalize_param_sets(param_sets)
+    os.makedirs(output_dir, exist_ok=True)
+
+    if max_workers == 1:
+        return [build_world(index, params, output_dir) for index, params in enumerate(param_sets)]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(build_world, index, params, output_dir) for index, params in enumerate(param_sets)]
+        return [future.result() for future in futures]
+
+
+def load_layer(result, name="layers"):
+    """Memory-map one layer of a generated world without reading it into RAM."""
+    return np.load(result["paths"][name], mmap_mode="r")